@@ -3,7 +3,75 @@ from qiskit import QuantumCircuit
 from qiskit_aer import AerSimulator
 import numpy as np
 
-def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False):
+from kernel_medicao import medir, simular_qubits_empacotados, sortear_escolhas
+from memoria import ArmazenamentoBits, MedidorMemoria, pico_memoria_residente, planejar_lotes
+
+# Memória de trabalho por qubit de um lote (sorteios int64 do laço de circuitos;
+# sorteios empacotados, arrays desempacotados e peneiração do motor vetorizado)
+BYTES_POR_QUBIT_CIRCUITOS = 32
+BYTES_POR_QUBIT_VETORIZADO = 24
+
+
+def _semente_aer(rng):
+    """Sorteia a semente de uma execução do AerSimulator a partir do gerador da simulação."""
+    return int(rng.integers(0, 2**31 - 1))
+
+
+def _sortear_bases(rng, prob_base_computacional=0.5, tamanho=None):
+    """Sorteia bases (0 = computacional, 1 = Hadamard) com o viés dado; sem viés usa rng.integers."""
+    if prob_base_computacional == 0.5:
+        return rng.integers(0, 2, tamanho)
+    return np.asarray(rng.random(tamanho) >= prob_base_computacional, dtype=np.int64)
+
+
+def _estatisticas_por_base(alice_chave, bob_chave, bases_chave):
+    """Tamanho e QBER da chave peneirada separados por base (índice 0 = computacional, 1 = Hadamard)."""
+    erros = np.bincount(bases_chave, weights=alice_chave != bob_chave, minlength=2)
+    tamanhos = np.bincount(bases_chave, minlength=2)
+    return {
+        'bases_chave': bases_chave,
+        'tamanho_base': tamanhos,
+        'taxa_erro_base': np.divide(erros, tamanhos, out=np.zeros(2), where=tamanhos > 0),
+    }
+
+
+class _AcumuladorResultado:
+    """Junta os lotes de uma simulação no dicionário de resultado de bb84_protocolo."""
+
+    def __init__(self, n_bits, em_disco=False, diretorio=None):
+        self.arrays = {nome: ArmazenamentoBits(n_bits, em_disco, diretorio)
+                       for nome in ('alice_bits', 'bob_resultados', 'alice_chave', 'bob_chave', 'bases_chave')}
+        self.erros_base = np.zeros(2, dtype=np.int64)
+        self.tamanho_base = np.zeros(2, dtype=np.int64)
+
+    def guardar(self, alice_bits, alice_bases, bob_bases, bob_resultados):
+        # Determina quais bits mantêm (onde as bases coincidem)
+        mesma_base = alice_bases == bob_bases
+        alice_chave = alice_bits[mesma_base]
+        bob_chave = bob_resultados[mesma_base]
+        bases_chave = alice_bases[mesma_base]
+
+        self.erros_base += np.bincount(bases_chave[alice_chave != bob_chave], minlength=2)
+        self.tamanho_base += np.bincount(bases_chave, minlength=2)
+        for nome, valores in (('alice_bits', alice_bits), ('bob_resultados', bob_resultados),
+                              ('alice_chave', alice_chave), ('bob_chave', bob_chave), ('bases_chave', bases_chave)):
+            self.arrays[nome].anexar(valores)
+
+    def resultado(self):
+        tamanho_chave = int(self.tamanho_base.sum())
+        return {
+            **{nome: array.finalizar() for nome, array in self.arrays.items()},
+            'taxa_erro': self.erros_base.sum() / tamanho_chave if tamanho_chave > 0 else 0,
+            'tamanho_chave': tamanho_chave,
+            'tamanho_base': self.tamanho_base,
+            'taxa_erro_base': np.divide(self.erros_base, self.tamanho_base, out=np.zeros(2),
+                                        where=self.tamanho_base > 0),
+            'pico_memoria_processo_bytes': pico_memoria_residente(),
+        }
+
+
+def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False, fracao_eve=1.0, seed=None,
+                   prob_base_computacional=0.5, memoria_max_bytes=None, diretorio_temporario=None):
     """
     Simula o protocolo BB84 para Distribuição de Chaves Quânticas
 
@@ -11,22 +79,52 @@ def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False):
         n_bits (int): Número de qubits a serem transmitidos
         erro_canal (float): Taxa de erro do canal quântico
         presenca_eve (bool): Se True, simula a presença de um espião
+        fracao_eve (float): Fração dos qubits interceptados por Eve (quando presente)
+        seed (int | None): Semente para reproduzir a simulação
+        prob_base_computacional (float): Probabilidade de Alice, Bob e Eve escolherem a
+            base computacional (> 1/2 = BB84 eficiente de Lo-Chau-Ardehali)
+        memoria_max_bytes (int | None): Orçamento de memória dos arrays da simulação; define
+            o tamanho dos lotes e, se o resultado não couber, ele vai para arquivos
+            temporários mapeados com np.memmap (None = um único lote em memória)
+        diretorio_temporario (str | None): Onde criar esses arquivos (padrão: o do sistema)
 
     Returns:
-        dict: Dicionário com resultados e estatísticas
+        dict: Dicionário com resultados e estatísticas, incluindo tamanho e QBER
+            da chave peneirada por base ('tamanho_base', 'taxa_erro_base'), a memória
+            residente usada pela simulação acima da do início ('pico_memoria_bytes',
+            ver memoria.MedidorMemoria) e o pico de memória residente do processo
+            inteiro ('pico_memoria_processo_bytes')
     """
+    with MedidorMemoria() as medidor:
+        rng = np.random.default_rng(seed)
+        lote, em_disco = planejar_lotes(n_bits, memoria_max_bytes, BYTES_POR_QUBIT_CIRCUITOS)
+        acumulador = _AcumuladorResultado(n_bits, em_disco, diretorio_temporario)
+
+        # Simulador quântico
+        simulator = AerSimulator()
+
+        for inicio in range(0, n_bits, lote):
+            tamanho = min(lote, n_bits - inicio)
+            _executar_circuitos(simulator, rng, tamanho, erro_canal, presenca_eve, fracao_eve,
+                                prob_base_computacional, acumulador)
+
+        resultado = acumulador.resultado()
+    resultado['pico_memoria_bytes'] = medidor.pico_bytes
+    return resultado
+
+
+def _executar_circuitos(simulator, rng, n_bits, erro_canal, presenca_eve, fracao_eve, prob_base_computacional,
+                        acumulador):
+    """Executa um lote de n_bits qubits no laço de circuitos de bb84_protocolo e guarda o resultado."""
     # Alice gera bits aleatórios para a mensagem e escolha de bases
-    alice_bits = np.random.randint(0, 2, n_bits)
-    alice_bases = np.random.randint(0, 2, n_bits)
+    alice_bits = rng.integers(0, 2, n_bits).astype(np.uint8)
+    alice_bases = _sortear_bases(rng, prob_base_computacional, n_bits).astype(np.uint8)
 
     # Bob escolhe bases aleatórias para medição
-    bob_bases = np.random.randint(0, 2, n_bits)
+    bob_bases = _sortear_bases(rng, prob_base_computacional, n_bits).astype(np.uint8)
 
-    # Lista para armazenar os resultados da medição de Bob
-    bob_resultados = []
-
-    # Simulador quântico
-    simulator = AerSimulator()
+    # Array para armazenar os resultados da medição de Bob
+    bob_resultados = np.empty(n_bits, dtype=np.uint8)
 
     # Para cada bit, Alice prepara um qubit e Bob mede
     for i in range(n_bits):
@@ -41,9 +139,9 @@ def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False):
             qc.h(0)  # Aplica porta Hadamard
 
         # Simulação de espião (Eve)
-        if presenca_eve:
+        if presenca_eve and rng.random() < fracao_eve:
             # Eve mede em uma base aleatória e reenvia
-            eve_base = np.random.randint(0, 2)
+            eve_base = _sortear_bases(rng, prob_base_computacional)
             eve_qc = qc.copy()  # Cria uma cópia do circuito para medição de Eve
 
             # Eve aplica H gate se sua base for 1 (Hadamard)
@@ -52,7 +150,7 @@ def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False):
 
             # Eve mede o circuito
             eve_qc.measure(0, 0)
-            resultado = simulator.run(eve_qc, shots=1).result().get_counts(eve_qc)
+            resultado = simulator.run(eve_qc, shots=1, seed_simulator=_semente_aer(rng)).result().get_counts(eve_qc)
             bit_medido = int(list(resultado.keys())[0])
 
             # Eve prepara um novo circuito baseado no que mediu
@@ -67,7 +165,7 @@ def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False):
             qc = new_qc  # Substitui o circuito original pelo novo preparado por Eve
 
         # Simulação de erro no canal
-        if np.random.random() < erro_canal:
+        if rng.random() < erro_canal:
             qc.x(0)  # Bit flip com probabilidade erro_canal
 
         # Bob mede na sua base escolhida
@@ -77,38 +175,419 @@ def bb84_protocolo(n_bits=100, erro_canal=0.05, presenca_eve=False):
         qc.measure(0, 0)
 
         # Executa o circuito e obtém resultados
-        resultado = simulator.run(qc, shots=1).result().get_counts(qc)
+        resultado = simulator.run(qc, shots=1, seed_simulator=_semente_aer(rng)).result().get_counts(qc)
 
         # Armazena o resultado de Bob
-        bit_medido = int(list(resultado.keys())[0])
-        bob_resultados.append(bit_medido)
+        bob_resultados[i] = int(list(resultado.keys())[0])
+
+    # Peneiração (sifted key) e taxa de erro são feitas pelo acumulador
+    acumulador.guardar(alice_bits, alice_bases, bob_bases, bob_resultados)
+
+def simular_qubits(n_bits, erro_canal=0.05, presenca_eve=False, fracao_eve=1.0, rng=None,
+                   prob_base_computacional=0.5):
+    """
+    Simula a transmissão de n_bits qubits sem circuitos, de forma vetorizada
+
+    Aplica as mesmas regras de transição dos circuitos de bb84_protocolo: quando a
+    base de medição coincide com a base do estado o resultado é o bit codificado,
+    caso contrário é aleatório. A porta X do erro de canal só altera estados da
+    base computacional (em |+⟩ e |-⟩ ela introduz apenas uma fase global). As
+    regras ficam em kernel_medicao e são aplicadas sobre os bits empacotados.
+
+    Args:
+        n_bits (int): Número de qubits a serem transmitidos
+        erro_canal (float | np.ndarray): Taxa de erro do canal quântico
+        presenca_eve (bool): Se True, simula a presença de um espião
+        fracao_eve (float | np.ndarray): Fração dos qubits interceptados por Eve (quando presente)
+        rng (np.random.Generator | None): Gerador de números aleatórios
+        prob_base_computacional (float): Probabilidade de escolher a base computacional
+
+    Returns:
+        tuple: (alice_bits, alice_bases, bob_bases, bob_resultados) como arrays uint8
+    """
+    empacotados = simular_qubits_empacotados(n_bits, erro_canal, presenca_eve, fracao_eve, rng,
+                                             prob_base_computacional=prob_base_computacional)
+    return tuple(np.unpackbits(array, count=n_bits) for array in empacotados)
+
+
+def bb84_protocolo_vetorizado(n_bits=100, erro_canal=0.05, presenca_eve=False, fracao_eve=1.0, seed=None,
+                              prob_base_computacional=0.5, memoria_max_bytes=None, diretorio_temporario=None):
+    """
+    Versão rápida de bb84_protocolo, sem executar um circuito por qubit
+
+    Args:
+        n_bits (int): Número de qubits a serem transmitidos
+        erro_canal (float): Taxa de erro do canal quântico
+        presenca_eve (bool): Se True, simula a presença de um espião
+        fracao_eve (float): Fração dos qubits interceptados por Eve (quando presente)
+        seed (int | None): Semente para reproduzir a simulação
+        prob_base_computacional (float): Probabilidade de escolher a base computacional
+        memoria_max_bytes (int | None): Orçamento de memória (ver bb84_protocolo)
+        diretorio_temporario (str | None): Onde criar os arquivos temporários
+
+    Returns:
+        dict: Dicionário com resultados e estatísticas (mesmas chaves de bb84_protocolo)
+    """
+    with MedidorMemoria() as medidor:
+        rng = np.random.default_rng(seed)
+        lote, em_disco = planejar_lotes(n_bits, memoria_max_bytes, BYTES_POR_QUBIT_VETORIZADO)
+        acumulador = _AcumuladorResultado(n_bits, em_disco, diretorio_temporario)
+
+        for inicio in range(0, n_bits, lote):
+            acumulador.guardar(*simular_qubits(min(lote, n_bits - inicio), erro_canal, presenca_eve, fracao_eve,
+                                               rng, prob_base_computacional))
+
+        resultado = acumulador.resultado()
+    resultado['pico_memoria_bytes'] = medidor.pico_bytes
+    return resultado
+
+
+class SimulacaoIncremental:
+    """
+    Simulação vetorizada que pode ser refeita para outra taxa de erro do canal
+
+    Os bits e bases de Alice e Bob, as medições de Eve e os resultados aleatórios
+    de Bob não dependem de erro_canal, então são sorteados uma única vez. O canal
+    usa um sorteio uniforme u por qubit (a porta X atua quando u < erro_canal), e
+    os resultados de Bob com e sem a porta X são calculados de antemão. Mudar a
+    taxa de erro só refaz a máscara do canal, a peneiração e o QBER; com a mesma
+    semente, resultados para taxas diferentes usam os mesmos sorteios.
+
+    Args:
+        n_bits (int): Número de qubits a serem transmitidos
+        presenca_eve (bool): Se True, simula a presença de um espião
+        fracao_eve (float): Fração dos qubits interceptados por Eve (quando presente)
+        seed (int | None): Semente para reproduzir a simulação
+        prob_base_computacional (float): Probabilidade de escolher a base computacional
+    """
+
+    def __init__(self, n_bits=100, presenca_eve=False, fracao_eve=1.0, seed=None, prob_base_computacional=0.5):
+        rng = np.random.default_rng(seed)
+        self.n_bits = n_bits
+        self.presenca_eve = presenca_eve
+        self.fracao_eve = fracao_eve
+        self.prob_base_computacional = prob_base_computacional
+
+        escolhas = sortear_escolhas(rng, n_bits, presenca_eve, fracao_eve, prob_base_computacional)
+        self.sorteio_canal = rng.random(n_bits, dtype=np.float32)
+
+        # Resultados de Bob nos dois casos possíveis do canal
+        sem_giro = medir(giro=np.zeros_like(escolhas['alice_bits']), **escolhas)
+        com_giro = medir(giro=np.full_like(escolhas['alice_bits'], 0xFF), **escolhas)
+
+        self.alice_bits = np.unpackbits(escolhas['alice_bits'], count=n_bits)
+        self.bob_sem_giro = np.unpackbits(sem_giro, count=n_bits)
+        self.bob_com_giro = np.unpackbits(com_giro, count=n_bits)
+        self.mesma_base = np.unpackbits(~(escolhas['alice_bases'] ^ escolhas['bob_bases']), count=n_bits).view(bool)
+        self.alice_chave = self.alice_bits[self.mesma_base]
+        self.bases_chave = np.unpackbits(escolhas['alice_bases'], count=n_bits)[self.mesma_base]
+
+        # Erros da chave peneirada em função de erro_canal: ordena os sorteios do canal e
+        # acumula quanto cada porta X muda a contagem de erros
+        erro_sem_giro = self.alice_chave != self.bob_sem_giro[self.mesma_base]
+        erro_com_giro = self.alice_chave != self.bob_com_giro[self.mesma_base]
+        ordem = np.argsort(self.sorteio_canal[self.mesma_base], kind='stable')
+        self._sorteios_ordenados = self.sorteio_canal[self.mesma_base][ordem]
+        variacao = erro_com_giro[ordem].astype(np.int64) - erro_sem_giro[ordem]
+        self._variacao_acumulada = np.concatenate(([0], np.cumsum(variacao)))
+        self._erros_sem_giro = int(np.count_nonzero(erro_sem_giro))
+
+    def erros(self, erro_canal):
+        """Número de erros na chave peneirada para a taxa de erro dada (O(log n))."""
+        k = np.searchsorted(self._sorteios_ordenados, np.float32(erro_canal), side='left')
+        return self._erros_sem_giro + int(self._variacao_acumulada[k])
+
+    def taxa_erro(self, erro_canal):
+        """QBER para a taxa de erro dada, sem montar os arrays do resultado."""
+        return self.erros(erro_canal) / len(self.alice_chave) if len(self.alice_chave) > 0 else 0
+
+    def resultado(self, erro_canal):
+        """
+        Reaplica o canal com a taxa de erro dada
+
+        Args:
+            erro_canal (float): Taxa de erro do canal quântico
+
+        Returns:
+            dict: Dicionário com resultados e estatísticas (mesmas chaves de bb84_protocolo)
+        """
+        with MedidorMemoria() as medidor:
+            giro = self.sorteio_canal < np.float32(erro_canal)
+            bob_resultados = np.where(giro, self.bob_com_giro, self.bob_sem_giro)
+            bob_chave = bob_resultados[self.mesma_base]
+            estatisticas = _estatisticas_por_base(self.alice_chave, bob_chave, self.bases_chave)
+
+        return {
+            'alice_bits': self.alice_bits,
+            'bob_resultados': bob_resultados,
+            'alice_chave': self.alice_chave,
+            'bob_chave': bob_chave,
+            'taxa_erro': self.taxa_erro(erro_canal),
+            'tamanho_chave': len(self.alice_chave),
+            **estatisticas,
+            'pico_memoria_bytes': medidor.pico_bytes,
+            'pico_memoria_processo_bytes': pico_memoria_residente(),
+        }
+
 
-    # Converte para numpy array para facilitar operações
-    bob_resultados = np.array(bob_resultados)
+def probabilidade_erro(erro_canal, presenca_eve=False, fracao_eve=1.0):
+    """
+    Probabilidade de erro de um bit da chave peneirada (QBER esperado)
+
+    Segue as regras dos circuitos: a porta X do canal só troca o bit na base
+    computacional (metade dos bits peneirados), e quando Eve mede na base errada
+    Bob obtém um resultado aleatório.
+
+    Args:
+        erro_canal (float | np.ndarray): Taxa de erro do canal quântico
+        presenca_eve (bool): Se True, considera a presença de um espião
+        fracao_eve (float | np.ndarray): Fração dos qubits interceptados por Eve (quando presente)
+
+    Returns:
+        float | np.ndarray: QBER esperado
+    """
+    sem_eve = erro_canal / 2
+    # Eve acerta a base em metade dos casos (erro só do canal) e erra na outra metade (erro 1/2)
+    com_eve = 0.5 * sem_eve + 0.25
+    if not presenca_eve:
+        return sem_eve
+    return (1 - fracao_eve) * sem_eve + fracao_eve * com_eve
+
+
+def entropia_binaria(p):
+    """
+    Entropia binária h(p) = -p log2(p) - (1-p) log2(1-p)
+
+    Args:
+        p (float | np.ndarray): Probabilidade (por exemplo, a taxa de erro)
+
+    Returns:
+        float | np.ndarray: h(p), com h(0) = h(1) = 0
+    """
+    p = np.clip(np.asarray(p, dtype=float), 0.0, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = -p * np.log2(p) - (1 - p) * np.log2(1 - p)
+    return np.nan_to_num(h)
+
+
+def fracao_chave_secreta(taxa_erro, eficiencia_correcao=1.0):
+    """
+    Fração da chave peneirada que sobra após correção de erros e amplificação de
+    privacidade no limite assintótico (Shor-Preskill): 1 - h(Q) - f h(Q)
+
+    Args:
+        taxa_erro (float | np.ndarray): Taxa de erro da chave peneirada (QBER)
+        eficiencia_correcao (float): Ineficiência f da correção de erros (1 = limite de Shannon)
+
+    Returns:
+        float | np.ndarray: Fração secreta, nunca negativa
+    """
+    h = entropia_binaria(taxa_erro)
+    return np.maximum(0.0, 1 - h - eficiencia_correcao * h)
+
+
+def tamanho_chave_finita(bits_chave, bits_teste, taxa_erro_chave, taxa_erro_teste, eficiencia_correcao=1.16,
+                         eps_seguranca=1e-10, eps_correcao=1e-15):
+    """
+    Tamanho da chave secreta com chaves finitas no BB84 eficiente (Tomamichel et al., 2012)
 
-    # Determina quais bits mantêm (onde as bases coincidem)
-    mesma_base = alice_bases == bob_bases
+    A chave vem só dos bits peneirados na base computacional; todos os bits
+    peneirados na base Hadamard são revelados para estimar o erro de fase, que
+    recebe a correção estatística mu por ser estimado numa amostra finita:
 
-    # Bits da chave peneirada (sifted key)
-    alice_chave = alice_bits[mesma_base]
-    bob_chave = bob_resultados[mesma_base]
+        l = n [1 - h(Q_x + mu)] - f n h(Q_z) - log2(2 / (eps_seg^2 eps_cor))
+        mu = sqrt((n + k) / (n k) * (k + 1) / k * ln(2 / eps_seg))
+
+    Args:
+        bits_chave (int | np.ndarray): Bits peneirados na base computacional (n)
+        bits_teste (int | np.ndarray): Bits peneirados na base Hadamard (k)
+        taxa_erro_chave (float | np.ndarray): QBER na base computacional (Q_z)
+        taxa_erro_teste (float | np.ndarray): QBER na base Hadamard (Q_x)
+        eficiencia_correcao (float): Ineficiência f da correção de erros
+        eps_seguranca (float): Parâmetro de sigilo
+        eps_correcao (float): Parâmetro de correção (verificação por hash)
+
+    Returns:
+        float | np.ndarray: Bits secretos (inteiro, nunca negativo; 0 sem bits de teste)
+    """
+    n = np.asarray(bits_chave, dtype=float)
+    k = np.asarray(bits_teste, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu = np.sqrt((n + k) / (n * k) * (k + 1) / k * np.log(2 / eps_seguranca))
+    erro_fase = np.minimum(0.5, taxa_erro_teste + np.nan_to_num(mu, nan=np.inf))
+    tamanho = (n * (1 - entropia_binaria(erro_fase)) - eficiencia_correcao * n * entropia_binaria(taxa_erro_chave)
+               - np.log2(2 / (eps_seguranca ** 2 * eps_correcao)))
+    return np.floor(np.where((n > 0) & (k > 0), np.maximum(tamanho, 0.0), 0.0))
+
+
+def chave_finita(resultado, eficiencia_correcao=1.16, eps_seguranca=1e-10, eps_correcao=1e-15):
+    """
+    Balanço de chave finita de um resultado de bb84_protocolo (ou dos outros motores)
 
-    # Verifica taxa de erro
-    taxa_erro = np.sum(alice_chave != bob_chave) / len(alice_chave) if len(alice_chave) > 0 else 0
+    Args:
+        resultado (dict): Resultado com 'alice_bits', 'tamanho_base' e 'taxa_erro_base'
+        eficiencia_correcao (float): Ineficiência f da correção de erros
+        eps_seguranca (float): Parâmetro de sigilo
+        eps_correcao (float): Parâmetro de correção
 
+    Returns:
+        dict: 'bits_chave', 'bits_teste', 'taxa_erro_chave', 'taxa_erro_teste',
+            'tamanho_chave_secreta', 'rendimento_peneiracao' (bits peneirados por qubit)
+            e 'rendimento' (bits secretos por qubit)
+    """
+    bits_chave, bits_teste = (int(t) for t in resultado['tamanho_base'])
+    taxa_erro_chave, taxa_erro_teste = (float(q) for q in resultado['taxa_erro_base'])
+    n_bits = len(resultado['alice_bits'])
+    secretos = int(tamanho_chave_finita(bits_chave, bits_teste, taxa_erro_chave, taxa_erro_teste,
+                                        eficiencia_correcao, eps_seguranca, eps_correcao))
     return {
-        'alice_bits': alice_bits,
-        'bob_resultados': bob_resultados,
-        'alice_chave': alice_chave,
-        'bob_chave': bob_chave,
-        'taxa_erro': taxa_erro,
-        'tamanho_chave': len(alice_chave)
+        'bits_chave': bits_chave,
+        'bits_teste': bits_teste,
+        'taxa_erro_chave': taxa_erro_chave,
+        'taxa_erro_teste': taxa_erro_teste,
+        'tamanho_chave_secreta': secretos,
+        'rendimento_peneiracao': (bits_chave + bits_teste) / n_bits if n_bits else 0.0,
+        'rendimento': secretos / n_bits if n_bits else 0.0,
+    }
+
+
+def prob_base_otima(n_bits, taxa_erro_chave, taxa_erro_teste=None, eficiencia_correcao=1.16,
+                    eps_seguranca=1e-10, eps_correcao=1e-15, pontos=2000):
+    """
+    Viés de base que maximiza a chave finita esperada para n_bits qubits
+
+    Com probabilidade p da base computacional, esperam-se n_bits p^2 bits de chave
+    e n_bits (1 - p)^2 bits de teste. Quanto maior n_bits, menor a fração de teste
+    necessária, então p tende a 1 e o rendimento da peneiração (p^2 + (1 - p)^2)
+    também.
+
+    Args:
+        n_bits (int): Qubits transmitidos
+        taxa_erro_chave (float): QBER esperado na base computacional
+        taxa_erro_teste (float | None): QBER esperado na base Hadamard (padrão: igual ao da chave)
+        eficiencia_correcao (float): Ineficiência f da correção de erros
+        eps_seguranca (float): Parâmetro de sigilo
+        eps_correcao (float): Parâmetro de correção
+        pontos (int): Pontos da busca em [1/2, 1)
+
+    Returns:
+        float: Probabilidade da base computacional (1/2 se nenhuma gera chave)
+    """
+    if taxa_erro_teste is None:
+        taxa_erro_teste = taxa_erro_chave
+    p = np.linspace(0.5, 1.0, pontos, endpoint=False)
+    tamanho = tamanho_chave_finita(n_bits * p ** 2, n_bits * (1 - p) ** 2, taxa_erro_chave, taxa_erro_teste,
+                                   eficiencia_correcao, eps_seguranca, eps_correcao)
+    return float(p[np.argmax(tamanho)]) if tamanho.max() > 0 else 0.5
+
+
+def curvas_qber(erros_canal, fracoes_eve=(0.0, 1.0), n_bits=100, repeticoes=50, eficiencia_correcao=1.0,
+                nivel_confianca=0.95, seed=None):
+    """
+    QBER, razão de chave peneirada e taxa de chave secreta em toda uma grade de
+    taxas de erro do canal x frações interceptadas por Eve
+
+    Cada repetição sorteia uma única vez as escolhas de n_bits qubits e um sorteio
+    uniforme por qubit para o canal (porta X quando u < erro_canal) e outro para
+    Eve (interceptação quando v < fracao_eve); todos os pontos da grade usam esses
+    mesmos sorteios. Para cada bit peneirado, o kernel calcula de antemão se há erro
+    nos quatro casos (com ou sem porta X, com ou sem Eve); os erros de toda a grade
+    saem de um único histograma dos pares (u, v) seguido de somas acumuladas nos
+    dois eixos, ao custo de uma execução de repeticoes * n_bits qubits.
+
+    Args:
+        erros_canal (array-like): Taxas de erro do canal (eixo 0 da grade)
+        fracoes_eve (array-like): Frações interceptadas por Eve, 0 = sem Eve (eixo 1 da grade)
+        n_bits (int): Qubits transmitidos em cada repetição
+        repeticoes (int): Execuções independentes, usadas para as faixas de confiança
+        eficiencia_correcao (float): Ineficiência da correção de erros
+        nivel_confianca (float): Fração das repetições contida em cada faixa
+        seed (int | None): Semente para reproduzir as curvas
+
+    Returns:
+        dict: 'erros_canal', 'fracoes_eve', 'qber_teoria' e, para 'qber',
+            'razao_peneirada' e 'taxa_chave_secreta' (bits secretos por qubit enviado),
+            o valor agregado e as faixas '<nome>_inferior' e '<nome>_superior';
+            todos com formato (len(erros_canal), len(fracoes_eve))
+    """
+    rng = np.random.default_rng(seed)
+    erros_canal = np.asarray(erros_canal, dtype=float)
+    fracoes_eve = np.asarray(fracoes_eve, dtype=float)
+    n_total = repeticoes * n_bits
+
+    escolhas = sortear_escolhas(rng, n_total, presenca_eve=True)
+    sorteio_canal = rng.random(n_total)
+    sorteio_eve = rng.random(n_total)
+
+    mesma_base = np.unpackbits(~(escolhas['alice_bases'] ^ escolhas['bob_bases']), count=n_total).view(bool)
+    peneirados = np.flatnonzero(mesma_base)
+    repeticao = peneirados // n_bits
+
+    # Erro de cada bit peneirado com e sem Eve (primeiro índice) e com e sem porta X (segundo)
+    nenhum = np.zeros_like(escolhas['alice_bits'])
+    todos = np.full_like(escolhas['alice_bits'], 0xFF)
+    erro = {}
+    for eve in (0, 1):
+        for giro in (0, 1):
+            bob = medir(**dict(escolhas, eve_mascara=todos if eve else nenhum), giro=todos if giro else nenhum)
+            erro[eve, giro] = np.unpackbits(bob ^ escolhas['alice_bits'], count=n_total)[peneirados].astype(np.int64)
+
+    # Classe de cada bit na grade ordenada: a porta X atua nos pontos j >= a e Eve nos pontos k >= b
+    ordem_canal = np.argsort(erros_canal, kind='stable')
+    ordem_eve = np.argsort(fracoes_eve, kind='stable')
+    a = np.searchsorted(erros_canal[ordem_canal], sorteio_canal[peneirados], side='right')
+    b = np.searchsorted(fracoes_eve[ordem_eve], sorteio_eve[peneirados], side='right')
+    linhas, colunas = len(erros_canal) + 1, len(fracoes_eve) + 1
+
+    # erros[j, k] = e00 + soma(a <= j) de (e01 - e00) + soma(b <= k) de (e10 - e00)
+    #               + soma(a <= j, b <= k) do termo cruzado; tudo num histograma só
+    zero = np.zeros_like(a)
+    celulas = np.concatenate([(repeticao * linhas + a_) * colunas + b_
+                              for a_, b_ in ((zero, zero), (a, zero), (zero, b), (a, b))])
+    pesos = np.concatenate((erro[0, 0], erro[0, 1] - erro[0, 0], erro[1, 0] - erro[0, 0],
+                            erro[1, 1] - erro[1, 0] - erro[0, 1] + erro[0, 0]))
+    erros = np.bincount(celulas, weights=pesos, minlength=repeticoes * linhas * colunas)
+    erros = erros.reshape(repeticoes, linhas, colunas).cumsum(axis=1).cumsum(axis=2)[:, :-1, :-1]
+    # Volta para a ordem da grade pedida
+    erros = erros[:, np.argsort(ordem_canal)][:, :, np.argsort(ordem_eve)]
+
+    tamanhos = np.bincount(repeticao, minlength=repeticoes)[:, None, None]
+    amostras = {
+        'qber': erros / np.maximum(tamanhos, 1),
+        'razao_peneirada': np.broadcast_to(tamanhos / n_bits, erros.shape),
+    }
+    amostras['taxa_chave_secreta'] = amostras['razao_peneirada'] * fracao_chave_secreta(amostras['qber'],
+                                                                                       eficiencia_correcao)
+    agregados = {
+        'qber': erros.sum(axis=0) / max(tamanhos.sum(), 1),
+        'razao_peneirada': amostras['razao_peneirada'].mean(axis=0),
+        'taxa_chave_secreta': amostras['taxa_chave_secreta'].mean(axis=0),
+    }
+
+    cauda = (1 - nivel_confianca) / 2
+    resultado = {
+        'erros_canal': erros_canal,
+        'fracoes_eve': fracoes_eve,
+        'qber_teoria': probabilidade_erro(erros_canal[:, None], True, fracoes_eve[None, :]),
     }
+    for nome, valores in amostras.items():
+        resultado[nome] = agregados[nome]
+        resultado[f'{nome}_inferior'], resultado[f'{nome}_superior'] = np.quantile(valores, [cauda, 1 - cauda], axis=0)
+    return resultado
+
+
+# Motores de simulação disponíveis (mesma assinatura e mesmo formato de resultado)
+MOTORES = {
+    'qiskit': bb84_protocolo,
+    'vetorizado': bb84_protocolo_vetorizado,
+}
+
 
-# Executa simulação sem espião
-resultado_sem_eve = bb84_protocolo(n_bits=1000, erro_canal=0.05, presenca_eve=False)
-print(f"Sem espião: Taxa de erro: {resultado_sem_eve['taxa_erro']:.4f}, Tamanho da chave: {resultado_sem_eve['tamanho_chave']}")
+if __name__ == "__main__":
+    # Executa simulação sem espião
+    resultado_sem_eve = bb84_protocolo(n_bits=1000, erro_canal=0.05, presenca_eve=False)
+    print(f"Sem espião: Taxa de erro: {resultado_sem_eve['taxa_erro']:.4f}, Tamanho da chave: {resultado_sem_eve['tamanho_chave']}")
 
-# Executa simulação com espião
-resultado_com_eve = bb84_protocolo(n_bits=1000, erro_canal=0.05, presenca_eve=True)
-print(f"Com espião: Taxa de erro: {resultado_com_eve['taxa_erro']:.4f}, Tamanho da chave: {resultado_com_eve['tamanho_chave']}")
\ No newline at end of file
+    # Executa simulação com espião
+    resultado_com_eve = bb84_protocolo(n_bits=1000, erro_canal=0.05, presenca_eve=True)
+    print(f"Com espião: Taxa de erro: {resultado_com_eve['taxa_erro']:.4f}, Tamanho da chave: {resultado_com_eve['tamanho_chave']}")
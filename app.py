@@ -2,7 +2,8 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
-from AlgorithmImplementation import bb84_protocolo
+from AlgorithmImplementation import bb84_protocolo, curvas_qber, probabilidade_erro, SimulacaoIncremental
+from perfil import PerfilExecucao, modo_ambiente
 from qiskit import QuantumCircuit
 from qiskit.visualization import plot_histogram
 import time
@@ -13,6 +14,13 @@ from matplotlib.animation import FuncAnimation
 
 st.set_page_config(layout="wide", page_title="BB84 Quantum Key Distribution Protocol")
 
+# Opt-in profiling of each rerun (BB84_PROFILE environment variable or the sidebar toggle)
+perfil = PerfilExecucao(ativo=modo_ambiente() is not None or st.session_state.get('perfil_ativo', False),
+                        modo=modo_ambiente() or 'cprofile')
+# Also stops a profiler left running by a rerun that Streamlit interrupted
+perfil.iniciar(st.session_state)
+perfil.etapa("Page header")
+
 st.markdown("<h1 class='main-header'>BB84 Quantum Key Distribution Protocol</h1>", unsafe_allow_html=True)
 
 st.markdown("""
@@ -22,18 +30,39 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Protocol parameters sidebar
+perfil.etapa("Sidebar widgets")
 with st.sidebar:
     st.markdown("### Protocol Parameters")
     n_bits = st.slider("Number of qubits", min_value=10, max_value=1000, value=100, step=10)
     erro_canal = st.slider("Channel error rate", min_value=0.0, max_value=0.2, value=0.05, step=0.01)
     presenca_eve = st.checkbox("Simulate Eve (eavesdropper)", value=False)
+    engine = st.radio("Simulation engine", ["Qiskit circuits", "Vectorized (NumPy)"], index=0,
+                      help="The vectorized engine applies the same measurement rules without running a circuit per "
+                           "qubit, and updates the results instantly when only the channel error rate changes.")
 
     if st.button("Run Simulation", type="primary"):
         with st.spinner("Running simulation..."):
-            resultado = bb84_protocolo(n_bits=n_bits, erro_canal=erro_canal, presenca_eve=presenca_eve)
+            if engine == "Qiskit circuits":
+                with perfil.secao("bb84_protocolo"):
+                    resultado = bb84_protocolo(n_bits=n_bits, erro_canal=erro_canal, presenca_eve=presenca_eve)
+                st.session_state.simulacao_incremental = None
+            else:
+                with perfil.secao("Vectorized simulation"):
+                    simulacao = SimulacaoIncremental(n_bits=n_bits, presenca_eve=presenca_eve)
+                    resultado = simulacao.resultado(erro_canal)
+                st.session_state.simulacao_incremental = simulacao
             st.session_state.resultado = resultado
+            st.session_state.erro_canal_resultado = erro_canal
             st.session_state.simulation_run = True
 
+    # With the vectorized engine, moving only the channel error slider reapplies the channel to the same draws
+    simulacao = st.session_state.get('simulacao_incremental')
+    if (simulacao is not None and erro_canal != st.session_state.get('erro_canal_resultado')
+            and simulacao.n_bits == n_bits and simulacao.presenca_eve == presenca_eve):
+        with perfil.secao("Vectorized simulation"):
+            st.session_state.resultado = simulacao.resultado(erro_canal)
+        st.session_state.erro_canal_resultado = erro_canal
+
     # Color options for the charts
     st.markdown("---")
     st.markdown("### Visualization Options")
@@ -46,6 +75,7 @@ with st.sidebar:
     st.session_state.color_theme = color_theme
 
     # Setting colors based on the choice (keeping white backgrounds)
+    perfil.etapa("Theme CSS")
     if color_theme == "Black and White":
         st.session_state.primary_color = "#000000"
         st.session_state.secondary_color = "#333333"
@@ -115,6 +145,7 @@ with st.sidebar:
         </style>
         """, unsafe_allow_html=True)
 
+    perfil.etapa("Sidebar widgets")
     st.markdown("---")
     st.markdown("### Protocol Steps")
     step_options = ["1. Quantum Bit Generation",
@@ -126,6 +157,7 @@ with st.sidebar:
     selected_step = st.radio("Navigate to step:", step_options)
 
 # Configure matplotlib style to match the theme
+perfil.etapa("Matplotlib rcParams")
 plt.style.use('default')  # Reset to default first
 plt.rcParams['axes.edgecolor'] = st.session_state.get('primary_color', '#000000')
 plt.rcParams['axes.labelcolor'] = st.session_state.get('primary_color', '#000000')
@@ -139,6 +171,7 @@ plt.rcParams['patch.edgecolor'] = st.session_state.get('primary_color', '#000000
 plt.rcParams['grid.color'] = '#DDDDDD'
 
 # Main content
+perfil.etapa("Tab: Protocol Visualization")
 tab1, tab2, tab3 = st.tabs(["Protocol Visualization", "Quantum Circuits", "Results Analysis"])
 
 with tab1:
@@ -168,7 +201,8 @@ with tab1:
                 ax.set_xticks(range(20))
                 ax.set_xticklabels(alice_bits[:20])
                 ax.set_title("First 20 random bits from Alice")
-                st.pyplot(fig)
+                with perfil.secao("Matplotlib rendering"):
+                    st.pyplot(fig)
             else:
                 st.info("Run the simulation to view Alice's random bits")
 
@@ -210,7 +244,8 @@ with tab1:
                 ax2.set_title("Bob's Bases (C = Computational, H = Hadamard)")
 
                 fig.tight_layout()
-                st.pyplot(fig)
+                with perfil.secao("Matplotlib rendering"):
+                    st.pyplot(fig)
             else:
                 st.info("Run the simulation to view the basis selection")
 
@@ -279,7 +314,8 @@ with tab1:
 
                 ax.set_title("Qubit Transmission")
                 ax.axis('off')
-                st.pyplot(fig)
+                with perfil.secao("Matplotlib rendering"):
+                    st.pyplot(fig)
 
                 # Add explanation
                 if presenca_eve:
@@ -348,7 +384,8 @@ with tab1:
                 ax.set_xlim(-1.5, display_len-0.5)
                 ax.set_ylim(-1, 2)
 
-                st.pyplot(fig)
+                with perfil.secao("Matplotlib rendering"):
+                    st.pyplot(fig)
 
                 # Display statistics
                 match_rate = np.sum(mesma_base) / len(mesma_base) * 100
@@ -392,7 +429,8 @@ with tab1:
                     ax2.set_title("Bob's sifted key (first bits)")
 
                     fig.tight_layout()
-                    st.pyplot(fig)
+                    with perfil.secao("Matplotlib rendering"):
+                        st.pyplot(fig)
 
                     # Display statistics
                     key_len = len(alice_chave)
@@ -424,9 +462,9 @@ with tab1:
                 bob_chave = st.session_state.resultado['bob_chave']
                 taxa_erro = st.session_state.resultado['taxa_erro']
 
-                # Calculate expected error rates
-                expected_error = erro_canal
-                expected_with_eve = 0.25 + erro_canal - (0.25 * erro_canal)  # Adjusted for combined probabilities
+                # Expected error rates from the same model as the Results Analysis curves
+                expected_error = probabilidade_erro(erro_canal, False)
+                expected_with_eve = probabilidade_erro(erro_canal, True)
 
                 # Create error rate visualization
                 fig, ax = plt.subplots(figsize=(8, 4))
@@ -459,7 +497,8 @@ with tab1:
                                 textcoords="offset points",
                                 ha='center', va='bottom')
 
-                st.pyplot(fig)
+                with perfil.secao("Matplotlib rendering"):
+                    st.pyplot(fig)
 
                 # Determine if Eve is detected
                 eve_detected = taxa_erro > 0.15
@@ -477,6 +516,7 @@ with tab1:
             else:
                 st.info("Run the simulation to analyze error rates")
 
+perfil.etapa("Tab: Quantum Circuits")
 with tab2:
     # Quantum Circuits Visualization
     st.markdown("<h2 class='sub-header'>Quantum Circuits</h2>", unsafe_allow_html=True)
@@ -549,6 +589,7 @@ with tab2:
     buf.seek(0)
     st.image(buf)
 
+perfil.etapa("Tab: Results Analysis")
 with tab3:
     # Results Analysis
     st.markdown("<h2 class='sub-header'>Results Analysis</h2>", unsafe_allow_html=True)
@@ -645,7 +686,8 @@ with tab3:
             )
 
             # Renderiza o gráfico
-            st.plotly_chart(fig, use_container_width=True)
+            with perfil.secao("Plotly serialization"):
+                st.plotly_chart(fig, use_container_width=True)
 
             # Security assessment
             if resultado['taxa_erro'] < 0.1:
@@ -672,162 +714,102 @@ with tab3:
         # Add comparison section
         st.markdown("<h3>Comparison: With vs. Without Eve</h3>", unsafe_allow_html=True)
 
-        # Run both simulations for comparison if not already done
-        if not hasattr(st.session_state, 'comparison_done'):
-            resultado_sem_eve = bb84_protocolo(n_bits=n_bits, erro_canal=erro_canal, presenca_eve=False)
-            resultado_com_eve = bb84_protocolo(n_bits=n_bits, erro_canal=erro_canal, presenca_eve=True)
-
-            st.session_state.resultado_sem_eve = resultado_sem_eve
-            st.session_state.resultado_com_eve = resultado_com_eve
-            st.session_state.comparison_done = True
-
-        # Create comparison charts with better colors
-        fig = go.Figure()
+        # Curves over the whole error-rate range, computed once per number of qubits
+        if st.session_state.get('curvas_n_bits') != n_bits:
+            with perfil.secao("curvas_qber"):
+                st.session_state.curvas = curvas_qber(np.linspace(0.0, 0.2, 21), [0.0, 0.5, 1.0], n_bits=n_bits,
+                                                      repeticoes=50)
+            st.session_state.curvas_n_bits = n_bits
+        curvas = st.session_state.curvas
 
         # Cores mais atraentes e contrastantes
-        without_eve_color = '#3b82f6'  # Azul brilhante
-        with_eve_color = '#f97316'  # Laranja
+        curve_colors = ['#3b82f6', '#eab308', '#f97316']  # Azul, amarelo e laranja
+        band_colors = ['rgba(59, 130, 246, 0.2)', 'rgba(234, 179, 8, 0.2)', 'rgba(249, 115, 22, 0.2)']
         grid_color = '#e2e8f0'  # Cinza claro para a grade
-
-        # Dados para o gráfico
-        metrics = ['Error Rate', 'Key Size Ratio', 'Bit Agreement']
-        without_eve_values = [
-            st.session_state.resultado_sem_eve['taxa_erro'],
-            st.session_state.resultado_sem_eve['tamanho_chave'] / n_bits,
-            1 - st.session_state.resultado_sem_eve['taxa_erro']
-        ]
-        with_eve_values = [
-            st.session_state.resultado_com_eve['taxa_erro'],
-            st.session_state.resultado_com_eve['tamanho_chave'] / n_bits,
-            1 - st.session_state.resultado_com_eve['taxa_erro']
-        ]
-
-        # Adiciona barras com bordas e estilo mais moderno
-        fig.add_trace(go.Bar(
-            x=metrics,
-            y=without_eve_values,
-            name='Without Eve',  # Make sure the name is explicit here
-            marker_color=without_eve_color,
-            marker_line_color='#1d4ed8',
-            marker_line_width=1.5,
-            opacity=0.9,
-            text=[f'{v:.2f}' for v in without_eve_values],
-            textposition='outside',
-            textfont=dict(color='#1e293b')
-        ))
-
-        fig.add_trace(go.Bar(
-            x=metrics,
-            y=with_eve_values,
-            name='With Eve',  # Make sure the name is explicit here
-            marker_color=with_eve_color,
-            marker_line_color='#c2410c',
-            marker_line_width=1.5,
-            opacity=0.9,
-            text=[f'{v:.2f}' for v in with_eve_values],
-            textposition='outside',
-            textfont=dict(color='#1e293b')
-        ))
-
-        # Configuração aprimorada do layout
-        fig.update_layout(
-            title={
-                'text': 'Impact of Eve on BB84 Protocol',
-                'y': 0.95,
-                'x': 0.5,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': dict(size=20, color="#1e293b", family='Arial')
-            },
-            xaxis_title={
-                'text': 'Protocol Metrics',
-                'font': dict(size=16, color="#475569")
-            },
-            yaxis_title={
-                'text': 'Value (normalized)',
-                'font': dict(size=16, color="#475569")
-            },
-            barmode='group',
-            bargap=0.3,
-            bargroupgap=0.1,
-            font=dict(
-                family="Arial, sans-serif",
-                color="#1e293b",
-                size=14
-            ),
-            paper_bgcolor='rgba(255, 255, 255, 0.95)',
-            plot_bgcolor='rgba(255, 255, 255, 0.95)',
-            margin=dict(l=60, r=30, t=80, b=120),  # Increased bottom margin even more
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.3,  # Moved legend even more down
-                xanchor="center",
-                x=0.5,
-                bgcolor='rgba(255,255,255,0.9)',
-                bordercolor="#d1d5db",
-                borderwidth=1,
-                font=dict(size=14)  # Increased legend font size
+        x = curvas['erros_canal']
+
+        def curve_figure(metric, title, yaxis_title):
+            fig = go.Figure()
+            for k, fracao in enumerate(curvas['fracoes_eve']):
+                name = "Without Eve" if fracao == 0 else f"Eve intercepts {fracao:.0%}"
+                # Faixa de confiança: limite superior seguido do inferior invertido
+                fig.add_trace(go.Scatter(
+                    x=np.concatenate((x, x[::-1])),
+                    y=np.concatenate((curvas[f'{metric}_superior'][:, k], curvas[f'{metric}_inferior'][::-1, k])),
+                    fill='toself',
+                    fillcolor=band_colors[k],
+                    line=dict(color='rgba(0, 0, 0, 0)'),
+                    hoverinfo='skip',
+                    showlegend=False
+                ))
+                fig.add_trace(go.Scatter(
+                    x=x,
+                    y=curvas[metric][:, k],
+                    mode='lines+markers',
+                    name=name,
+                    line=dict(color=curve_colors[k], width=3),
+                    marker=dict(size=6)
+                ))
+            # Marca a taxa de erro escolhida na barra lateral
+            fig.add_vline(x=erro_canal, line_dash='dash', line_color='#64748b',
+                          annotation_text="Current error rate", annotation_position="top")
+            fig.update_layout(
+                title={
+                    'text': title,
+                    'y': 0.95,
+                    'x': 0.5,
+                    'xanchor': 'center',
+                    'yanchor': 'top',
+                    'font': dict(size=20, color="#1e293b", family='Arial')
+                },
+                xaxis_title={
+                    'text': 'Channel error rate',
+                    'font': dict(size=16, color="#475569")
+                },
+                yaxis_title={
+                    'text': yaxis_title,
+                    'font': dict(size=16, color="#475569")
+                },
+                font=dict(
+                    family="Arial, sans-serif",
+                    color="#1e293b",
+                    size=14
+                ),
+                paper_bgcolor='rgba(255, 255, 255, 0.95)',
+                plot_bgcolor='rgba(255, 255, 255, 0.95)',
+                margin=dict(l=60, r=30, t=80, b=120),
+                legend=dict(
+                    orientation="h",
+                    yanchor="bottom",
+                    y=-0.4,
+                    xanchor="center",
+                    x=0.5,
+                    bgcolor='rgba(255,255,255,0.9)',
+                    bordercolor="#d1d5db",
+                    borderwidth=1,
+                    font=dict(size=14)
+                )
             )
-        )
-
-        # Improve x-axis readability
-        fig.update_xaxes(
-            tickfont=dict(size=14, color="#1e293b"),  # Larger font for x-axis labels
-            tickangle=0,  # Keep labels horizontal
-            title_standoff=20  # More space for title
-        )
-
-        # Adiciona grade de fundo para facilitar leitura dos valores
-        fig.update_yaxes(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor=grid_color,
-            zeroline=True,
-            zerolinewidth=1.5,
-            zerolinecolor='#94a3b8',
-            range=[0, max(max(without_eve_values), max(with_eve_values)) * 1.2]  # Ajusta escala
-        )
-
-        # Adiciona anotações explicativas com posicionamento melhorado
-        fig.add_annotation(
-            x='Error Rate',
-            y=max(without_eve_values[0], with_eve_values[0]) * 1.15,
-            text="Higher with Eve = Security risk",
-            showarrow=True,
-            arrowhead=2,
-            arrowsize=1,
-            arrowcolor="#64748b",
-            ax=-40,
-            ay=-40,
-            font=dict(size=12, color="#1e293b")
-        )
-
-        fig.add_annotation(
-            x='Bit Agreement',
-            y=max(without_eve_values[2], with_eve_values[2]) * 1.15,
-            text="Lower with Eve = Compromised key",
-            showarrow=True,
-            arrowhead=2,
-            arrowsize=1,
-            arrowcolor="#64748b",
-            ax=40,
-            ay=-40,
-            font=dict(size=12, color="#1e293b")
-        )
-
-        # EXPLICITLY SET LEGEND ITEMS - this is the critical fix
-        fig.data[0].name = "Without Eve"
-        fig.data[1].name = "With Eve"
-
-        # Completely remove any legend title that might be causing issues
-        fig.update_layout(
-            legend_title_text='',
-            showlegend=True
-        )
-
-        # Renderiza o gráfico
-        st.plotly_chart(fig, use_container_width=True)
+            fig.update_xaxes(showgrid=True, gridcolor=grid_color, tickfont=dict(size=14, color="#1e293b"))
+            fig.update_yaxes(showgrid=True, gridcolor=grid_color, rangemode='tozero')
+            return fig
+
+        # Renderiza os gráficos
+        curve_col1, curve_col2 = st.columns(2)
+        with curve_col1:
+            fig = curve_figure('qber', 'Error Rate (QBER)', 'QBER')
+            with perfil.secao("Plotly serialization"):
+                st.plotly_chart(fig, use_container_width=True)
+        with curve_col2:
+            fig = curve_figure('taxa_chave_secreta', 'Secret Key Rate', 'Secret bits per qubit sent')
+            with perfil.secao("Plotly serialization"):
+                st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown(f"<p>Each curve uses the same random draws for every point; shaded bands contain 95% of "
+                    f"50 runs with {n_bits} qubits. The sifted key ratio stays at "
+                    f"{curvas['razao_peneirada'][0, 0]:.2f} "
+                    f"({curvas['razao_peneirada_inferior'][0, 0]:.2f}-{curvas['razao_peneirada_superior'][0, 0]:.2f}) "
+                    f"with or without Eve.</p>", unsafe_allow_html=True)
 
         st.markdown("""
         <div class='section'>
@@ -835,7 +817,7 @@ with tab3:
             <ul>
                 <li>Eve's presence significantly increases the error rate (theoretically by ~25%)</li>
                 <li>The key size (after sifting) remains similar with or without Eve</li>
-                <li>Bit agreement drops substantially when Eve intercepts the communication</li>
+                <li>The secret key rate drops to zero once the error rate passes the security threshold, as it does whenever Eve intercepts every qubit</li>
             </ul>
             <p>This demonstrates the main advantage of the BB84 protocol: the ability to <b>detect espionage</b> using quantum principles.</p>
         </div>
@@ -844,6 +826,7 @@ with tab3:
     else:
         st.info("Run the simulation to see the results analysis")
 
+perfil.etapa("Footer")
 st.markdown("""
 <div class='section'>
     <h3>Fundamentals of the BB84 Protocol</h3>
@@ -855,4 +838,27 @@ st.markdown("""
     </ul>
     <p>These principles ensure that any espionage attempt will introduce detectable errors in the transmission.</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+perfil.finalizar()
+caminho_perfil = perfil.salvar()
+
+# Diagnostics (rendered after the measurements, so not included in them)
+with st.sidebar:
+    st.markdown("---")
+    st.checkbox("Profile reruns", key='perfil_ativo',
+                help="Record per-section timings and a cProfile dump of every rerun. Can also be enabled with the "
+                     "BB84_PROFILE environment variable.")
+
+if perfil.ativo:
+    with st.expander("Diagnostics: rerun profile", expanded=True):
+        st.markdown(f"Last rerun took **{perfil.total_s * 1000:.0f} ms** ({perfil.modo}).")
+        st.dataframe(perfil.tabela(), hide_index=True, use_container_width=True)
+        if perfil.aviso:
+            st.warning(perfil.aviso)
+        dados_perfil, extensao = perfil.exportar()
+        if dados_perfil is not None:
+            st.download_button("Download profile", dados_perfil, file_name=f"bb84-rerun{extensao}")
+            st.code(perfil.resumo(), language=None)
+        if caminho_perfil:
+            st.caption(f"Saved to {caminho_perfil}")
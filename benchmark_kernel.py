@@ -0,0 +1,79 @@
+"""
+Compara o kernel de medição com o laço de circuitos de bb84_protocolo
+
+Mede qubits por segundo (em um único núcleo) de:
+    - bb84_protocolo: um circuito do AerSimulator por qubit
+    - kernel NumPy e kernel Numba, sobre bits empacotados, só a aplicação das regras
+    - simular_qubits_empacotados: sorteios + kernel
+    - bb84_protocolo_vetorizado: simulação completa com peneiração e QBER
+
+Exemplo:
+    python benchmark_kernel.py --n-qubits 100000000 --circuit-qubits 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+import kernel_medicao
+from AlgorithmImplementation import bb84_protocolo, bb84_protocolo_vetorizado
+
+META_QUBITS_POR_S = 1e8
+
+
+def cronometrar(funcao, repeticoes=3):
+    """Menor tempo (s) entre algumas execuções de funcao()."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the measurement kernel against the per-circuit loop.")
+    parser.add_argument('--n-qubits', type=int, default=10**8, help="Qubits for the vectorized runs (default: 1e8)")
+    parser.add_argument('--circuit-qubits', type=int, default=500, help="Qubits for bb84_protocolo (default: 500)")
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--eve', action='store_true', help="Include Eve's intercept-resend")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    n = args.n_qubits
+    resultados = {}
+
+    tempo = cronometrar(lambda: bb84_protocolo(args.circuit_qubits, args.error_rate, args.eve, seed=args.seed), 1)
+    resultados['bb84_protocolo (Aer, per circuit)'] = args.circuit_qubits / tempo
+
+    # Entradas empacotadas sorteadas uma vez, para medir só o kernel
+    entradas = [kernel_medicao.bits_aleatorios(rng, n) for _ in range(5)]
+    entradas[3] = kernel_medicao.mascara_bernoulli(rng, n, args.error_rate)
+    eve = [kernel_medicao.mascara_bernoulli(rng, n, 1.0)] + [kernel_medicao.bits_aleatorios(rng, n) for _ in range(2)] \
+        if args.eve else [None, None, None]
+    saida = np.empty_like(entradas[0])
+
+    resultados['kernel NumPy (packed)'] = n / cronometrar(
+        lambda: kernel_medicao.medir(*entradas, *eve, out=saida, usar_numba=False))
+    if kernel_medicao.NUMBA_DISPONIVEL:
+        kernel_medicao.medir(*entradas, *eve, out=saida, usar_numba=True)  # compila
+        resultados['kernel Numba (packed)'] = n / cronometrar(
+            lambda: kernel_medicao.medir(*entradas, *eve, out=saida, usar_numba=True))
+    del entradas, eve, saida
+
+    resultados['simular_qubits_empacotados (draws + kernel)'] = n / cronometrar(
+        lambda: kernel_medicao.simular_qubits_empacotados(n, args.error_rate, args.eve, rng=rng))
+    resultados['bb84_protocolo_vetorizado (full run)'] = n / cronometrar(
+        lambda: bb84_protocolo_vetorizado(n, args.error_rate, args.eve, seed=args.seed), 1)
+
+    referencia = resultados['bb84_protocolo (Aer, per circuit)']
+    largura = max(len(nome) for nome in resultados)
+    print(f"{'engine':<{largura}}  {'qubits/s':>12}  {'speedup':>10}  target 1e8/s")
+    for nome, taxa in resultados.items():
+        meta = 'ok' if taxa >= META_QUBITS_POR_S else '-'
+        print(f"{nome:<{largura}}  {taxa:>12.3e}  {taxa / referencia:>10.0f}x  {meta}")
+
+
+if __name__ == "__main__":
+    main()
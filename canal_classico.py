@@ -0,0 +1,279 @@
+"""
+Simulação do canal clássico autenticado do pós-processamento BB84
+
+Depois da transmissão dos qubits, cada bloco de qubits detectados passa por
+cinco mensagens alternadas entre Bob e Alice:
+    1. Bob anuncia as suas bases
+    2. Alice devolve a máscara de peneiração, a semente da amostra de teste e os
+       seus bits nas posições da amostra
+    3. Bob responde com o número de erros na amostra (estimativa do QBER)
+    4. Alice envia o síndrome da correção de erros (código com eficiência f), o
+       hash de verificação e a semente da amplificação de privacidade
+    5. Bob confirma a verificação
+
+Todas as mensagens de um mesmo sentido e de um mesmo lote de blocos são
+empacotadas num único quadro, com um cabeçalho por mensagem e uma única
+etiqueta de autenticação no estilo Wegman-Carter: hash polinomial (ε-ASU) com
+chave reutilizada e etiqueta cifrada com one-time pad, então cada etiqueta de t
+bits consome t bits de chave pré-compartilhada. O tamanho t é o menor com
+colisão (L/t) 2^-t <= eps_autenticacao para um quadro de L bits.
+
+Os tamanhos das mensagens saem dos dados simulados (qubits, bits peneirados e
+erros na amostra de cada bloco); o conteúdo em si não é montado.
+
+Exemplo:
+    python canal_classico.py --n-bits 10000000 --block-size 1000000 --rtt 1e-3 \\
+        --bandwidth 1e6 --batch 4 --target-rate 100000
+"""
+import argparse
+import json
+
+import numpy as np
+
+from AlgorithmImplementation import entropia_binaria, fracao_chave_secreta, simular_qubits
+
+# Tipo (1 byte), índice do bloco (4 bytes) e comprimento da carga (4 bytes)
+BYTES_CABECALHO = 9
+# Sementes da amostra de teste e da amplificação de privacidade
+BYTES_SEMENTE = 32
+# Contadores e comprimentos enviados nas mensagens
+BYTES_CONTADOR = 4
+
+# Ordem das mensagens de cada bloco: (remetente, [tipos])
+TRECHOS = [
+    ('bob', ['bases']),
+    ('alice', ['peneiracao', 'amostra']),
+    ('bob', ['estimativa']),
+    ('alice', ['sindrome', 'verificacao', 'privacidade']),
+    ('bob', ['confirmacao']),
+]
+
+
+def bits_etiqueta(bits_mensagem, eps_autenticacao=1e-12):
+    """
+    Menor etiqueta do hash polinomial para autenticar bits_mensagem bits
+
+    A mensagem é dividida em palavras de t bits e avaliada como polinômio em
+    GF(2^t); a probabilidade de falsificação é (bits_mensagem / t) / 2^t.
+
+    Args:
+        bits_mensagem (int): Tamanho do quadro autenticado
+        eps_autenticacao (float): Probabilidade máxima de falsificação por quadro
+
+    Returns:
+        int: Tamanho t da etiqueta em bits
+    """
+    t = 32
+    while np.ceil(bits_mensagem / t) * 2.0 ** -t > eps_autenticacao:
+        t += 8
+    return t
+
+
+class CanalClassico:
+    """
+    Canal clássico autenticado que contabiliza bytes, etiquetas e trechos
+
+    As mensagens ficam pendentes por remetente até `transmitir`, que envia todas
+    num único quadro com uma etiqueta.
+
+    Args:
+        eps_autenticacao (float): Probabilidade máxima de falsificação por quadro
+    """
+
+    def __init__(self, eps_autenticacao=1e-12):
+        self.eps_autenticacao = eps_autenticacao
+        self.pendentes = {'alice': [], 'bob': []}
+        self.bytes_enviados = {'alice': 0, 'bob': 0}
+        self.bytes_por_tipo = {}
+        self.mensagens = 0
+        self.quadros = 0
+        self.trechos = 0
+        self.bits_etiquetas = 0
+        self.maior_etiqueta = 0
+
+    def enviar(self, remetente, tipo, bits_carga):
+        """Acrescenta uma mensagem de bits_carga bits ao próximo quadro do remetente."""
+        tamanho = BYTES_CABECALHO + -(-int(bits_carga) // 8)
+        self.pendentes[remetente].append((tipo, tamanho))
+
+    def transmitir(self, remetente):
+        """
+        Envia num quadro autenticado todas as mensagens pendentes do remetente
+
+        Returns:
+            int: Bytes do quadro (0 se não havia mensagens)
+        """
+        mensagens = self.pendentes[remetente]
+        if not mensagens:
+            return 0
+        carga = sum(tamanho for _, tamanho in mensagens)
+        t = bits_etiqueta(8 * carga, self.eps_autenticacao)
+        quadro = carga + -(-t // 8)
+
+        for tipo, tamanho in mensagens:
+            self.bytes_por_tipo[tipo] = self.bytes_por_tipo.get(tipo, 0) + tamanho
+        self.bytes_por_tipo['etiqueta'] = self.bytes_por_tipo.get('etiqueta', 0) + quadro - carga
+        self.bytes_enviados[remetente] += quadro
+        self.mensagens += len(mensagens)
+        self.quadros += 1
+        self.trechos += 1
+        self.bits_etiquetas += t
+        self.maior_etiqueta = max(self.maior_etiqueta, t)
+        self.pendentes[remetente] = []
+        return quadro
+
+    def chave_consumida(self):
+        """Bits de chave pré-compartilhada: ponto de avaliação do hash (reutilizado) mais o pad das etiquetas."""
+        return self.maior_etiqueta + self.bits_etiquetas
+
+
+def simular_pos_processamento(alice_bits, alice_bases, bob_bases, bob_resultados, tamanho_bloco=10**6,
+                              prob_base_computacional=0.5, fracao_amostra=0.1, eficiencia_correcao=1.16,
+                              eps_autenticacao=1e-12, eps_correcao=1e-15, blocos_por_lote=1,
+                              latencia_rtt_s=1e-3, banda_bps=1e9, seed=None):
+    """
+    Simula as mensagens do pós-processamento e o custo do canal clássico
+
+    Args:
+        alice_bits, alice_bases, bob_bases, bob_resultados (np.ndarray): Qubits
+            detectados (por exemplo, a saída de simular_qubits)
+        tamanho_bloco (int): Qubits detectados por bloco de pós-processamento
+        prob_base_computacional (float): Viés das bases; as bases anunciadas e a máscara
+            de peneiração são codificadas com n h(p) bits (codificação aritmética)
+        fracao_amostra (float): Fração dos bits peneirados revelada para estimar o QBER
+        eficiencia_correcao (float): Ineficiência f da correção de erros (tamanho do síndrome)
+        eps_autenticacao (float): Probabilidade máxima de falsificação por quadro
+        eps_correcao (float): Probabilidade de erro da verificação por hash
+        blocos_por_lote (int): Blocos cujas mensagens vão nos mesmos quadros
+        latencia_rtt_s (float): Ida e volta do canal clássico
+        banda_bps (float): Banda do canal clássico (bits/s)
+        seed (int | None): Semente da escolha das amostras
+
+    Returns:
+        dict: Totais de bytes (por sentido e por tipo de mensagem), quadros,
+            trechos, idas e voltas, chave pré-compartilhada consumida, bits secretos
+            e tempo ocupado no canal clássico
+    """
+    rng = np.random.default_rng(seed)
+    n_bits = len(alice_bits)
+    n_blocos = -(-n_bits // tamanho_bloco)
+    bloco = np.arange(n_bits) // tamanho_bloco
+
+    # Estatísticas de cada bloco que definem o tamanho das mensagens
+    mesma_base = alice_bases == bob_bases
+    qubits = np.bincount(bloco, minlength=n_blocos)
+    peneirados = np.bincount(bloco, weights=mesma_base, minlength=n_blocos).astype(np.int64)
+    amostra = mesma_base & (rng.random(n_bits) < fracao_amostra)
+    amostrados = np.bincount(bloco, weights=amostra, minlength=n_blocos).astype(np.int64)
+    erros_amostra = np.bincount(bloco, weights=amostra & (alice_bits != bob_resultados),
+                                minlength=n_blocos).astype(np.int64)
+
+    restantes = peneirados - amostrados
+    taxa_estimada = np.divide(erros_amostra, amostrados, out=np.full(n_blocos, 0.5), where=amostrados > 0)
+    bits_sindrome = np.ceil(eficiencia_correcao * restantes * entropia_binaria(taxa_estimada)).astype(np.int64)
+    bits_verificacao = int(np.ceil(np.log2(1 / eps_correcao)))
+    # fracao_chave_secreta já desconta o síndrome (f h(Q))
+    secretos = np.maximum(0, np.floor(restantes * fracao_chave_secreta(taxa_estimada, eficiencia_correcao))
+                          - bits_verificacao).astype(np.int64)
+    bits_bases = np.ceil(qubits * entropia_binaria(prob_base_computacional)).astype(np.int64)
+    prob_peneiracao = prob_base_computacional ** 2 + (1 - prob_base_computacional) ** 2
+    bits_peneiracao = np.ceil(qubits * entropia_binaria(prob_peneiracao)).astype(np.int64)
+
+    cargas = {
+        'bases': bits_bases,
+        'peneiracao': bits_peneiracao,
+        'amostra': np.full(n_blocos, 8 * BYTES_SEMENTE) + amostrados,
+        'estimativa': np.full(n_blocos, 8 * BYTES_CONTADOR),
+        'sindrome': bits_sindrome,
+        'verificacao': np.full(n_blocos, bits_verificacao),
+        'privacidade': np.full(n_blocos, 8 * (BYTES_SEMENTE + BYTES_CONTADOR)),
+        'confirmacao': np.full(n_blocos, 8),
+    }
+
+    canal = CanalClassico(eps_autenticacao)
+    tempo_s = 0.0
+    for inicio in range(0, n_blocos, blocos_por_lote):
+        for remetente, tipos in TRECHOS:
+            for b in range(inicio, min(inicio + blocos_por_lote, n_blocos)):
+                for tipo in tipos:
+                    canal.enviar(remetente, tipo, cargas[tipo][b])
+            quadro = canal.transmitir(remetente)
+            tempo_s += latencia_rtt_s / 2 + 8 * quadro / banda_bps
+
+    total_bytes = canal.bytes_enviados['alice'] + canal.bytes_enviados['bob']
+    total_secretos = int(secretos.sum())
+    return {
+        'blocos': int(n_blocos),
+        'bits_peneirados': int(peneirados.sum()),
+        'bits_amostra': int(amostrados.sum()),
+        'bits_secretos': total_secretos,
+        'bytes_alice_para_bob': canal.bytes_enviados['alice'],
+        'bytes_bob_para_alice': canal.bytes_enviados['bob'],
+        'bytes_total': total_bytes,
+        'bytes_por_tipo': canal.bytes_por_tipo,
+        'mensagens': canal.mensagens,
+        'quadros': canal.quadros,
+        'idas_e_voltas': canal.trechos / 2,
+        'chave_pre_compartilhada_bits': canal.chave_consumida(),
+        'chave_liquida_bits': total_secretos - canal.chave_consumida(),
+        'bytes_por_bit_secreto': total_bytes / total_secretos if total_secretos else None,
+        'tempo_canal_s': tempo_s,
+    }
+
+
+def dimensionar_enlace(relatorio, taxa_chave_alvo_bps):
+    """
+    Banda e chave pré-compartilhada necessárias para sustentar uma taxa de chave
+
+    Args:
+        relatorio (dict): Saída de simular_pos_processamento
+        taxa_chave_alvo_bps (float): Bits secretos por segundo desejados
+
+    Returns:
+        dict: 'banda_bps' do canal clássico, 'consumo_chave_bps' de chave
+            pré-compartilhada e 'idas_e_voltas_por_s' (None se não houve chave)
+    """
+    secretos = relatorio['bits_secretos']
+    if not secretos:
+        return {'banda_bps': None, 'consumo_chave_bps': None, 'idas_e_voltas_por_s': None}
+    escala = taxa_chave_alvo_bps / secretos
+    return {
+        'banda_bps': 8 * relatorio['bytes_total'] * escala,
+        'consumo_chave_bps': relatorio['chave_pre_compartilhada_bits'] * escala,
+        'idas_e_voltas_por_s': relatorio['idas_e_voltas'] * escala,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classical-channel cost of BB84 post-processing.")
+    parser.add_argument('--n-bits', type=int, default=10**7, help="Detected qubits to simulate (default: 1e7)")
+    parser.add_argument('--error-rate', type=float, default=0.02, help="Channel error rate (default: 0.02)")
+    parser.add_argument('--z-basis-probability', type=float, default=0.5,
+                        help="Probability of choosing the computational basis (default: 0.5)")
+    parser.add_argument('--block-size', type=int, default=10**6, help="Qubits per block (default: 1e6)")
+    parser.add_argument('--sample-fraction', type=float, default=0.1,
+                        help="Fraction of sifted bits disclosed for QBER estimation (default: 0.1)")
+    parser.add_argument('--batch', type=int, default=1, help="Blocks packed into the same frames (default: 1)")
+    parser.add_argument('--auth-epsilon', type=float, default=1e-12,
+                        help="Forgery probability per authenticated frame (default: 1e-12)")
+    parser.add_argument('--rtt', type=float, default=1e-3, help="Classical round-trip latency in s (default: 1e-3)")
+    parser.add_argument('--bandwidth', type=float, default=1e9, help="Classical link bandwidth in bit/s (default: 1e9)")
+    parser.add_argument('--target-rate', type=float, default=None,
+                        help="Secret-key rate in bit/s to size the classical link for")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    qubits = simular_qubits(args.n_bits, args.error_rate, rng=rng, prob_base_computacional=args.z_basis_probability)
+    relatorio = simular_pos_processamento(*qubits, tamanho_bloco=args.block_size,
+                                          prob_base_computacional=args.z_basis_probability,
+                                          fracao_amostra=args.sample_fraction, eps_autenticacao=args.auth_epsilon,
+                                          blocos_por_lote=args.batch, latencia_rtt_s=args.rtt,
+                                          banda_bps=args.bandwidth, seed=rng)
+    if args.target_rate is not None:
+        relatorio['dimensionamento'] = dimensionar_enlace(relatorio, args.target_rate)
+    print(json.dumps(relatorio, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Linha de comando para executar lotes de simulações BB84 sem o Streamlit
+
+Cada repetição gera uma linha JSON (JSON Lines) na saída padrão ou no arquivo
+indicado, na ordem das repetições, assim que fica pronta.
+
+Exemplo:
+    python cli.py --engine vetorizado --n-bits 100000 --error-rate 0.05 \\
+        --eve intercept-resend --seed 42 --repetitions 100 --workers 4 -o resultados.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from AlgorithmImplementation import MOTORES, chave_finita
+from memoria import reiniciar_pico_memoria
+
+ESTRATEGIAS_EVE = ['none', 'intercept-resend']
+
+
+def _bits_para_texto(bits):
+    """Converte um array de bits em uma string de '0' e '1'."""
+    return (np.asarray(bits, dtype=np.uint8) + ord('0')).tobytes().decode('ascii')
+
+
+def executar_repeticao(tarefa):
+    """
+    Executa uma repetição da simulação e monta o registro JSON correspondente
+
+    Args:
+        tarefa (dict): Parâmetros da repetição (motor, n_bits, erro_canal, eve,
+            fracao_eve, prob_base_computacional, memoria_max_bytes, seed, repeticao, incluir_chaves)
+
+    Returns:
+        str: Linha JSON com os resultados da repetição
+    """
+    protocolo = MOTORES[tarefa['motor']]
+    presenca_eve = tarefa['eve'] != 'none'
+
+    # Cada processo roda uma repetição por vez, então o pico do processo é o da repetição
+    reiniciar_pico_memoria()
+    inicio = time.perf_counter()
+    resultado = protocolo(n_bits=tarefa['n_bits'], erro_canal=tarefa['erro_canal'],
+                          presenca_eve=presenca_eve, fracao_eve=tarefa['fracao_eve'],
+                          seed=tarefa['seed'], prob_base_computacional=tarefa['prob_base_computacional'],
+                          memoria_max_bytes=tarefa['memoria_max_bytes'])
+    duracao = time.perf_counter() - inicio
+    finita = chave_finita(resultado)
+
+    registro = {
+        'engine': tarefa['motor'],
+        'repetition': tarefa['repeticao'],
+        'seed': tarefa['semente_base'],
+        'n_bits': tarefa['n_bits'],
+        'error_rate': tarefa['erro_canal'],
+        'eve': tarefa['eve'],
+        'eve_fraction': tarefa['fracao_eve'],
+        'z_basis_probability': tarefa['prob_base_computacional'],
+        'qber': float(resultado['taxa_erro']),
+        'sifted_key_length': int(resultado['tamanho_chave']),
+        'qber_z': finita['taxa_erro_chave'],
+        'qber_x': finita['taxa_erro_teste'],
+        'sifted_z': finita['bits_chave'],
+        'sifted_x': finita['bits_teste'],
+        'finite_key_length': finita['tamanho_chave_secreta'],
+        'duration_s': duracao,
+        'peak_rss_bytes': resultado['pico_memoria_processo_bytes'],
+        'run_memory_bytes': resultado['pico_memoria_bytes'],
+    }
+    if tarefa['incluir_chaves']:
+        registro['alice_key'] = _bits_para_texto(resultado['alice_chave'])
+        registro['bob_key'] = _bits_para_texto(resultado['bob_chave'])
+
+    return json.dumps(registro)
+
+
+def gerar_tarefas(args):
+    """Gera os parâmetros de cada repetição, com sementes independentes derivadas de --seed."""
+    sementes = np.random.SeedSequence(args.seed)
+    for repeticao, semente in enumerate(sementes.spawn(args.repetitions)):
+        yield {
+            'motor': args.engine,
+            'n_bits': args.n_bits,
+            'erro_canal': args.error_rate,
+            'eve': args.eve,
+            'fracao_eve': args.eve_fraction,
+            'prob_base_computacional': args.z_basis_probability,
+            'memoria_max_bytes': None if args.memory_budget is None else int(args.memory_budget * 2**20),
+            'seed': semente,
+            'semente_base': sementes.entropy,
+            'repeticao': repeticao,
+            'incluir_chaves': args.include_keys,
+        }
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Run batches of BB84 simulations and stream JSON-lines results.")
+    parser.add_argument('--engine', choices=sorted(MOTORES), default='vetorizado',
+                        help="Simulation engine (default: vetorizado)")
+    parser.add_argument('--n-bits', type=int, default=1000, help="Number of qubits per run (default: 1000)")
+    parser.add_argument('--error-rate', type=float, default=0.05, help="Channel error rate (default: 0.05)")
+    parser.add_argument('--eve', choices=ESTRATEGIAS_EVE, default='none', help="Eavesdropper strategy (default: none)")
+    parser.add_argument('--eve-fraction', type=float, default=1.0,
+                        help="Fraction of qubits intercepted by Eve (default: 1.0)")
+    parser.add_argument('--z-basis-probability', type=float, default=0.5,
+                        help="Probability of choosing the computational basis; above 0.5 runs efficient BB84 "
+                             "(default: 0.5)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Base seed; each repetition gets an independent child seed (default: random)")
+    parser.add_argument('--repetitions', type=int, default=1, help="Number of runs (default: 1)")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument('--memory-budget', type=float, default=None,
+                        help="Memory budget per run in MiB; picks the batch size and spills results to temporary "
+                             "files when they do not fit (default: no limit)")
+    parser.add_argument('--include-keys', action='store_true', help="Include Alice's and Bob's sifted keys in each line")
+    parser.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    return parser
+
+
+def main(argv=None):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+
+    if args.n_bits < 1 or args.repetitions < 1 or args.workers < 1:
+        parser.error("--n-bits, --repetitions and --workers must be positive")
+    if not 0.0 <= args.error_rate <= 1.0 or not 0.0 <= args.eve_fraction <= 1.0:
+        parser.error("--error-rate and --eve-fraction must be between 0 and 1")
+    if not 0.0 < args.z_basis_probability < 1.0:
+        parser.error("--z-basis-probability must be strictly between 0 and 1")
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be positive")
+
+    saida = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.workers == 1:
+            linhas = map(executar_repeticao, gerar_tarefas(args))
+            for linha in linhas:
+                saida.write(linha + '\n')
+                saida.flush()
+        else:
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                for linha in executor.map(executar_repeticao, gerar_tarefas(args)):
+                    saida.write(linha + '\n')
+                    saida.flush()
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+
+if __name__ == "__main__":
+    main()
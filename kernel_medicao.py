@@ -0,0 +1,219 @@
+"""
+Kernel de medição do BB84 sem vetor de estado
+
+O resultado de Bob só depende de poucos casos: se a base de medição coincide
+com a base em que o qubit foi preparado, ele obtém o bit codificado (trocado se
+a porta X do canal atuou num estado da base computacional); caso contrário o
+resultado é aleatório. A interceptação de Eve segue a mesma regra e depois
+reprepara o qubit na base dela.
+
+As regras são escritas só com operações bit a bit (&, |, ^, ~) sobre arrays
+uint8, então funcionam tanto com um qubit por byte (valores 0/1) quanto com os
+bits empacotados por `np.packbits` (8 qubits por byte). Se o Numba estiver
+instalado, as operações são fundidas em um único laço compilado; caso contrário
+usa-se NumPy puro.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+
+# Abaixo desta probabilidade a máscara de Bernoulli é sorteada pelas posições (saltos geométricos)
+LIMITE_MASCARA_ESPARSA = 0.1
+
+
+def _medir_numpy(alice_bits, alice_bases, bob_bases, giro, aleatorio_bob,
+                 eve_mascara, eve_bases, aleatorio_eve, out):
+    estado_bits = alice_bits
+    estado_bases = alice_bases
+
+    if eve_mascara is not None:
+        # Eve mede: bit correto se a base coincide, aleatório caso contrário
+        coincide = ~(eve_bases ^ estado_bases)
+        eve_bits = (coincide & estado_bits) | (~coincide & aleatorio_eve)
+        # e reprepara os qubits interceptados na sua base
+        estado_bits = (eve_mascara & eve_bits) | (~eve_mascara & estado_bits)
+        estado_bases = (eve_mascara & eve_bases) | (~eve_mascara & estado_bases)
+
+    # A porta X só troca o bit de estados da base computacional (base 0)
+    estado_bits = estado_bits ^ (giro & ~estado_bases)
+
+    coincide = ~(bob_bases ^ estado_bases)
+    np.bitwise_or(coincide & estado_bits, ~coincide & aleatorio_bob, out=out)
+    return out
+
+
+if NUMBA_DISPONIVEL:
+    @njit(cache=True, nogil=True)
+    def _medir_numba(alice_bits, alice_bases, bob_bases, giro, aleatorio_bob,
+                     eve_mascara, eve_bases, aleatorio_eve, com_eve, out):
+        for i in range(alice_bits.shape[0]):
+            estado_bit = alice_bits[i]
+            estado_base = alice_bases[i]
+            if com_eve:
+                coincide = ~(eve_bases[i] ^ estado_base)
+                eve_bit = (coincide & estado_bit) | (~coincide & aleatorio_eve[i])
+                estado_bit = (eve_mascara[i] & eve_bit) | (~eve_mascara[i] & estado_bit)
+                estado_base = (eve_mascara[i] & eve_bases[i]) | (~eve_mascara[i] & estado_base)
+            estado_bit ^= giro[i] & ~estado_base
+            coincide = ~(bob_bases[i] ^ estado_base)
+            out[i] = (coincide & estado_bit) | (~coincide & aleatorio_bob[i])
+        return out
+
+
+def medir(alice_bits, alice_bases, bob_bases, giro, aleatorio_bob,
+          eve_mascara=None, eve_bases=None, aleatorio_eve=None, out=None, usar_numba=None):
+    """
+    Calcula os resultados de Bob a partir das escolhas e sorteios de cada qubit
+
+    Todos os arrays são uint8 com o mesmo formato: um qubit por byte (0/1) ou
+    8 qubits por byte (empacotados com np.packbits).
+
+    Args:
+        alice_bits (np.ndarray): Bits codificados por Alice
+        alice_bases (np.ndarray): Bases de Alice (0 = computacional, 1 = Hadamard)
+        bob_bases (np.ndarray): Bases de medição de Bob
+        giro (np.ndarray): Onde o canal aplica a porta X
+        aleatorio_bob (np.ndarray): Resultado de Bob quando a base não coincide
+        eve_mascara (np.ndarray | None): Qubits interceptados por Eve (None = sem Eve)
+        eve_bases (np.ndarray | None): Bases de medição de Eve
+        aleatorio_eve (np.ndarray | None): Resultado de Eve quando a base não coincide
+        out (np.ndarray | None): Array de saída (pode ser um dos arrays de entrada)
+        usar_numba (bool | None): Força (ou desativa) o laço compilado; None usa se disponível
+
+    Returns:
+        np.ndarray: Resultados de Bob (uint8, mesmo formato das entradas)
+    """
+    if out is None:
+        out = np.empty_like(alice_bits)
+    if usar_numba is None:
+        usar_numba = NUMBA_DISPONIVEL
+    if usar_numba and not NUMBA_DISPONIVEL:
+        raise ImportError("numba is not installed")
+
+    if usar_numba:
+        com_eve = eve_mascara is not None
+        if not com_eve:
+            eve_mascara = eve_bases = aleatorio_eve = alice_bits
+        return _medir_numba(alice_bits.ravel(), alice_bases.ravel(), bob_bases.ravel(), giro.ravel(),
+                            aleatorio_bob.ravel(), eve_mascara.ravel(), eve_bases.ravel(), aleatorio_eve.ravel(),
+                            com_eve, out.reshape(-1)).reshape(out.shape)
+    return _medir_numpy(alice_bits, alice_bases, bob_bases, giro, aleatorio_bob,
+                        eve_mascara, eve_bases, aleatorio_eve, out)
+
+
+def bits_aleatorios(rng, n_bits):
+    """Sorteia n_bits bits uniformes já empacotados (uint8, MSB primeiro)."""
+    return np.frombuffer(rng.bytes(-(-n_bits // 8)), dtype=np.uint8).copy()
+
+
+def mascara_bernoulli(rng, n_bits, p):
+    """
+    Sorteia uma máscara empacotada em que cada bit vale 1 com probabilidade p
+
+    Para p pequeno sorteia só as posições dos uns (saltos geométricos), o que
+    custa O(p * n_bits) sorteios em vez de n_bits.
+
+    Args:
+        rng (np.random.Generator): Gerador de números aleatórios
+        n_bits (int): Número de bits
+        p (float | np.ndarray): Probabilidade (escalar ou uma por bit)
+
+    Returns:
+        np.ndarray: Máscara empacotada (uint8)
+    """
+    n_bytes = -(-n_bits // 8)
+    if np.ndim(p) > 0 or LIMITE_MASCARA_ESPARSA <= p < 1:
+        return np.packbits(rng.random(n_bits) < p)
+    if p <= 0:
+        return np.zeros(n_bytes, dtype=np.uint8)
+    if p >= 1:
+        return np.packbits(np.ones(n_bits, dtype=bool))
+
+    # Posições dos uns: soma acumulada de saltos geométricos
+    esperados = n_bits * p
+    posicoes = []
+    ultimo = -1
+    while ultimo < n_bits:
+        saltos = rng.geometric(p, int(esperados + 6 * np.sqrt(esperados) + 16))
+        novas = ultimo + np.cumsum(saltos)
+        ultimo = novas[-1]
+        posicoes.append(novas[novas < n_bits])
+    posicoes = np.concatenate(posicoes)
+
+    # Posições distintas de um mesmo byte ocupam bits distintos, então somar equivale a OU
+    pesos = (0x80 >> (posicoes & 7)).astype(np.float64)
+    return np.bincount(posicoes >> 3, weights=pesos, minlength=n_bytes).astype(np.uint8)
+
+
+def bases_aleatorias(rng, n_bits, prob_base_computacional=0.5):
+    """
+    Sorteia n_bits bases empacotadas (0 = computacional, 1 = Hadamard)
+
+    Com probabilidade 1/2 usa os mesmos bits uniformes de bits_aleatorios; com
+    viés, a base Hadamard (a mais rara) é sorteada como máscara de Bernoulli.
+    """
+    if prob_base_computacional == 0.5:
+        return bits_aleatorios(rng, n_bits)
+    return mascara_bernoulli(rng, n_bits, 1.0 - prob_base_computacional)
+
+
+def sortear_escolhas(rng, n_bits, presenca_eve=False, fracao_eve=1.0, prob_base_computacional=0.5):
+    """
+    Sorteia, empacotados, todos os valores de n_bits qubits que não dependem do canal
+
+    Args:
+        rng (np.random.Generator): Gerador de números aleatórios
+        n_bits (int): Número de qubits
+        presenca_eve (bool): Se True, sorteia também as escolhas de Eve
+        fracao_eve (float | np.ndarray): Fração dos qubits interceptados por Eve (quando presente)
+        prob_base_computacional (float): Probabilidade de cada parte escolher a base
+            computacional (BB84 eficiente quando > 1/2); Eve conhece o viés e o usa também
+
+    Returns:
+        dict: Argumentos de `medir` exceto `giro` (os de Eve são None sem espião)
+    """
+    escolhas = {
+        'alice_bits': bits_aleatorios(rng, n_bits),
+        'alice_bases': bases_aleatorias(rng, n_bits, prob_base_computacional),
+        'bob_bases': bases_aleatorias(rng, n_bits, prob_base_computacional),
+        'eve_mascara': None,
+        'eve_bases': None,
+        'aleatorio_eve': None,
+    }
+    if presenca_eve:
+        escolhas['eve_mascara'] = mascara_bernoulli(rng, n_bits, fracao_eve)
+        escolhas['eve_bases'] = bases_aleatorias(rng, n_bits, prob_base_computacional)
+        escolhas['aleatorio_eve'] = bits_aleatorios(rng, n_bits)
+    escolhas['aleatorio_bob'] = bits_aleatorios(rng, n_bits)
+    return escolhas
+
+
+def simular_qubits_empacotados(n_bits, erro_canal=0.05, presenca_eve=False, fracao_eve=1.0, rng=None,
+                               usar_numba=None, prob_base_computacional=0.5):
+    """
+    Sorteia as escolhas de n_bits qubits e aplica o kernel sobre os bits empacotados
+
+    Args:
+        n_bits (int): Número de qubits
+        erro_canal (float | np.ndarray): Taxa de erro do canal quântico
+        presenca_eve (bool): Se True, simula a presença de um espião
+        fracao_eve (float | np.ndarray): Fração dos qubits interceptados por Eve (quando presente)
+        rng (np.random.Generator | None): Gerador de números aleatórios
+        usar_numba (bool | None): Ver `medir`
+        prob_base_computacional (float): Ver `sortear_escolhas`
+
+    Returns:
+        tuple: (alice_bits, alice_bases, bob_bases, bob_resultados) empacotados (uint8)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    escolhas = sortear_escolhas(rng, n_bits, presenca_eve, fracao_eve, prob_base_computacional)
+    giro = mascara_bernoulli(rng, n_bits, erro_canal)
+
+    bob_resultados = medir(giro=giro, out=escolhas['aleatorio_bob'], usar_numba=usar_numba, **escolhas)
+    return escolhas['alice_bits'], escolhas['alice_bases'], escolhas['bob_bases'], bob_resultados
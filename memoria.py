@@ -0,0 +1,224 @@
+"""
+Orçamento de memória para as simulações com muitos qubits
+
+A simulação é feita em lotes cujo tamanho sai do orçamento, e os arrays do
+resultado (um qubit por byte, uint8) são acumulados em um `ArmazenamentoBits`.
+Quando esses arrays não cabem na metade do orçamento, cada lote é escrito em
+um arquivo temporário anônimo e, no fim, o arquivo é mapeado com `np.memmap`
+só para leitura: as páginas só ocupam memória quando são lidas e podem ser
+descartadas pelo sistema a qualquer momento.
+
+A memória usada por uma simulação é medida com `MedidorMemoria`: o pico da
+memória residente durante a simulação menos a memória residente no início dela.
+O pico do processo inteiro (VmHWM em /proc/self/status no Linux, ru_maxrss nos
+outros sistemas) também é informado, mas inclui tudo o que o processo já fez;
+quem roda uma simulação por vez no processo (como o cli.py, antes de cada
+repetição) pode zerá-lo com `reiniciar_pico_memoria`.
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+    _malloc_trim = _libc.malloc_trim
+except (OSError, AttributeError):  # fora da glibc
+    _malloc_trim = None
+
+try:
+    TAMANHO_PAGINA = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    TAMANHO_PAGINA = 4096
+
+# Menor lote aceito, mesmo com orçamentos muito pequenos
+LOTE_MINIMO = 1 << 12
+
+# Arrays do resultado guardados por qubit: bits de Alice e resultados de Bob, e
+# (no máximo) um byte por qubit para cada uma das chaves e bases peneiradas
+BYTES_RESULTADO_POR_QUBIT = 5
+
+
+def reiniciar_pico_memoria():
+    """
+    Zera o pico de memória residente (VmHWM) do processo inteiro (Linux)
+
+    Afeta todas as threads e qualquer outra medida de pico do processo, então só
+    deve ser chamada quando nada mais roda ao mesmo tempo (por exemplo, não dentro
+    do servidor do Streamlit).
+
+    Returns:
+        bool: False se não for possível (sem /proc ou sem permissão)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as arquivo:
+            arquivo.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def pico_memoria_residente():
+    """Pico de memória residente do processo em bytes (None se o sistema não informar)."""
+    try:
+        with open('/proc/self/status') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está em bytes no macOS e em KiB nos demais
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def memoria_residente():
+    """Memória residente atual do processo em bytes (None se o sistema não informar)."""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * TAMANHO_PAGINA
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class MedidorMemoria:
+    """
+    Pico de memória residente de um bloco `with` acima da memória residente na entrada
+
+    Na entrada, a memória livre do heap é devolvida ao sistema (malloc_trim da
+    glibc), para que o bloco não reaproveite páginas que já estavam residentes e
+    sua memória apareça na medida. Uma thread amostra a memória residente a cada
+    `intervalo_s`. Se o pico do processo (VmHWM) subir durante o bloco, o novo
+    pico foi atingido dentro dele e é usado no lugar das amostras, então picos
+    curtos também são medidos nesse caso. Outras threads que alocam memória ao
+    mesmo tempo entram na medida.
+
+    Args:
+        intervalo_s (float): Intervalo entre as amostras
+
+    Exemplo:
+        with MedidorMemoria() as medidor:
+            ...
+        medidor.pico_bytes
+    """
+
+    def __init__(self, intervalo_s=0.005):
+        self.intervalo_s = intervalo_s
+        self.base = None
+        self.pico = None
+        self._pico_processo = None
+        self._fim = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if _malloc_trim is not None:
+            _malloc_trim(0)
+        self.base = memoria_residente()
+        if self.base is None:
+            return self
+        self.pico = self.base
+        self._pico_processo = pico_memoria_residente()
+        self._thread = threading.Thread(target=self._amostrar, name='MedidorMemoria', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is None:
+            return
+        self._fim.set()
+        self._thread.join()
+        self._registrar(memoria_residente())
+        pico_processo = pico_memoria_residente()
+        if self._pico_processo is not None and pico_processo is not None and pico_processo > self._pico_processo:
+            self.pico = max(self.pico, pico_processo)
+
+    def _registrar(self, atual):
+        if atual is not None and atual > self.pico:
+            self.pico = atual
+
+    def _amostrar(self):
+        while not self._fim.wait(self.intervalo_s):
+            self._registrar(memoria_residente())
+
+    @property
+    def pico_bytes(self):
+        """Pico acima da memória residente de entrada (None se o sistema não informar)."""
+        return None if self.base is None else max(0, self.pico - self.base)
+
+
+def planejar_lotes(n_bits, memoria_max_bytes, bytes_por_qubit):
+    """
+    Escolhe o tamanho do lote e se o resultado vai para o disco
+
+    Metade do orçamento fica para os arrays de trabalho de um lote e metade para
+    os arrays do resultado; se estes não couberem, vão para arquivos temporários
+    e o lote pode usar o orçamento inteiro.
+
+    Args:
+        n_bits (int): Número total de qubits
+        memoria_max_bytes (int | None): Orçamento (None = sem limite: um único lote em memória)
+        bytes_por_qubit (int): Memória de trabalho por qubit de um lote
+
+    Returns:
+        tuple: (tamanho do lote, True se o resultado deve ir para o disco)
+    """
+    if memoria_max_bytes is None:
+        return max(1, n_bits), False
+    em_disco = n_bits * BYTES_RESULTADO_POR_QUBIT > memoria_max_bytes // 2
+    disponivel = memoria_max_bytes if em_disco else memoria_max_bytes - n_bits * BYTES_RESULTADO_POR_QUBIT
+    return int(max(LOTE_MINIMO, min(n_bits, disponivel // bytes_por_qubit))), em_disco
+
+
+class ArmazenamentoBits:
+    """
+    Array uint8 que cresce por lotes, em memória ou em um arquivo temporário
+
+    Args:
+        capacidade (int): Número máximo de elementos
+        em_disco (bool): Se True, escreve os lotes em um arquivo temporário
+        diretorio (str | None): Diretório do arquivo temporário (padrão: o do sistema)
+    """
+
+    def __init__(self, capacidade, em_disco=False, diretorio=None):
+        self.tamanho = 0
+        self._arquivo = tempfile.TemporaryFile(dir=diretorio) if em_disco else None
+        self._dados = None if em_disco else np.empty(capacidade, dtype=np.uint8)
+
+    def anexar(self, valores):
+        """Acrescenta os valores (0/1) ao final."""
+        valores = np.asarray(valores, dtype=np.uint8)
+        if self._arquivo is not None:
+            self._arquivo.write(np.ascontiguousarray(valores))
+        else:
+            self._dados[self.tamanho:self.tamanho + len(valores)] = valores
+        self.tamanho += len(valores)
+
+    def finalizar(self):
+        """
+        Devolve o conteúdo acumulado
+
+        Returns:
+            np.ndarray: Array uint8 (np.memmap somente leitura quando está em disco)
+        """
+        if self._arquivo is None:
+            return self._dados[:self.tamanho]
+        self._arquivo.flush()
+        if self.tamanho == 0:
+            dados = np.zeros(0, dtype=np.uint8)
+        else:
+            # O mapeamento mantém o arquivo (já removido do diretório) vivo depois do close
+            dados = np.memmap(self._arquivo, dtype=np.uint8, mode='r', shape=(self.tamanho,))
+        self._arquivo.close()
+        return dados
+
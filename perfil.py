@@ -0,0 +1,226 @@
+"""
+Perfilamento opcional das reexecuções do app Streamlit
+
+Cada reexecução do app.py é dividida em etapas sequenciais (`etapa` fecha a
+anterior e abre a próxima, sem mudar a indentação do script) e em seções
+aninhadas para chamadas específicas (`secao`, como gerenciador de contexto).
+Com o perfil desativado as duas são praticamente gratuitas.
+
+Ativação:
+    BB84_PROFILE=1 (ou cprofile)   cProfile em toda reexecução
+    BB84_PROFILE=pyinstrument      pyinstrument, se estiver instalado
+    BB84_PROFILE_DIR=perfis        grava um arquivo por reexecução nesse diretório
+ou pela opção "Profile reruns" da barra lateral (usa cProfile).
+
+Os arquivos .prof são o formato do cProfile/pstats (abrem com snakeviz,
+flameprof, gprof2dot ou `python -m pstats`); os .pyisession abrem com
+`pyinstrument --load arquivo.pyisession`.
+
+Exemplo:
+    BB84_PROFILE=1 BB84_PROFILE_DIR=perfis python -m streamlit run app.py
+"""
+import contextlib
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import time
+
+try:
+    from pyinstrument import Profiler
+    PYINSTRUMENT_DISPONIVEL = True
+except ImportError:
+    PYINSTRUMENT_DISPONIVEL = False
+
+VARIAVEL_MODO = 'BB84_PROFILE'
+VARIAVEL_DIRETORIO = 'BB84_PROFILE_DIR'
+# Chave do perfilador ativo no estado da sessão (st.session_state)
+CHAVE_ESTADO = '_perfil_perfilador_ativo'
+
+
+def _parar_perfilador(perfilador):
+    """Para um perfilador (cProfile ou pyinstrument) que possa ter ficado ligado."""
+    try:
+        if isinstance(perfilador, cProfile.Profile):
+            perfilador.disable()
+        elif perfilador.is_running:
+            perfilador.stop()
+    except (RuntimeError, ValueError):
+        pass
+
+
+def modo_ambiente():
+    """Modo pedido pela variável de ambiente: 'cprofile', 'pyinstrument' ou None (desativado)."""
+    valor = os.environ.get(VARIAVEL_MODO, '').strip().lower()
+    if valor in ('', '0', 'false', 'no', 'off'):
+        return None
+    return 'pyinstrument' if valor == 'pyinstrument' else 'cprofile'
+
+
+class PerfilExecucao:
+    """
+    Tempos por etapa de uma reexecução e, opcionalmente, o perfil completo das chamadas
+
+    Args:
+        ativo (bool): Se False, etapa e secao não fazem nada
+        modo (str): 'cprofile' ou 'pyinstrument' (cai para cProfile se este não estiver instalado)
+    """
+
+    def __init__(self, ativo=False, modo='cprofile'):
+        self.ativo = ativo
+        self.modo = modo if modo != 'pyinstrument' or PYINSTRUMENT_DISPONIVEL else 'cprofile'
+        # nome -> [segundos, chamadas, etapa em que a seção está contida]
+        self.tempos = {}
+        self.total_s = 0.0
+        self.aviso = None
+        self._perfilador = None
+        self._estado = None
+        self._inicio = None
+        self._etapa = None
+        self._inicio_etapa = None
+
+    def iniciar(self, estado=None):
+        """
+        Começa a medir a reexecução (chamar logo no início do script)
+
+        O Streamlit interrompe uma reexecução quando um widget muda no meio dela, e
+        então `finalizar` não roda. Por isso o perfilador ativo fica guardado em
+        `estado` e o que sobrou de uma reexecução interrompida é parado aqui; sem
+        isso ele continuaria coletando e, no Python 3.12+ (em que o cProfile usa o
+        sys.monitoring, global no processo), nenhum outro poderia ser ligado.
+
+        Args:
+            estado (MutableMapping | None): Onde guardar o perfilador ativo entre
+                reexecuções (st.session_state)
+        """
+        if estado is not None:
+            sobra = estado.pop(CHAVE_ESTADO, None)
+            if sobra is not None:
+                _parar_perfilador(sobra)
+        self._estado = estado
+        if not self.ativo:
+            return
+        self._inicio = time.perf_counter()
+        try:
+            if self.modo == 'pyinstrument':
+                self._perfilador = Profiler()
+                self._perfilador.start()
+            else:
+                self._perfilador = cProfile.Profile()
+                self._perfilador.enable()
+        except (RuntimeError, ValueError) as erro:
+            # Outro perfilador já está ativo nesta thread: fica só com os tempos por etapa
+            self._perfilador = None
+            self.aviso = f"Call profiler unavailable: {erro}"
+        if estado is not None and self._perfilador is not None:
+            estado[CHAVE_ESTADO] = self._perfilador
+
+    def _registrar(self, nome, segundos, etapa=None):
+        registro = self.tempos.setdefault(nome, [0.0, 0, etapa])
+        registro[0] += segundos
+        registro[1] += 1
+
+    def etapa(self, nome):
+        """Fecha a etapa atual (se houver) e abre a etapa `nome`."""
+        if not self.ativo:
+            return
+        agora = time.perf_counter()
+        if self._etapa is not None:
+            self._registrar(self._etapa, agora - self._inicio_etapa)
+        self._etapa = nome
+        self._inicio_etapa = agora
+
+    @contextlib.contextmanager
+    def secao(self, nome):
+        """Mede o bloco `with` como uma seção contida na etapa atual."""
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._registrar(nome, time.perf_counter() - inicio, self._etapa)
+
+    def finalizar(self):
+        """Fecha a última etapa e para o perfilador (chamar no fim do script)."""
+        if not self.ativo:
+            return
+        self.etapa(None)
+        self.total_s = time.perf_counter() - self._inicio
+        if self._perfilador is not None:
+            if self.modo == 'pyinstrument':
+                self._perfilador.stop()
+            else:
+                self._perfilador.disable()
+        if self._estado is not None:
+            self._estado.pop(CHAVE_ESTADO, None)
+
+    def tabela(self):
+        """
+        Tempos da reexecução para exibição
+
+        Returns:
+            list[dict]: Uma linha por etapa ou seção ('Section', 'Within', 'Time (ms)',
+                'Calls', 'Share of rerun')
+        """
+        return [{
+            'Section': nome,
+            'Within': etapa or '',
+            'Time (ms)': round(segundos * 1000, 2),
+            'Calls': chamadas,
+            'Share of rerun': f"{segundos / self.total_s:.1%}" if self.total_s else '',
+        } for nome, (segundos, chamadas, etapa) in self.tempos.items()]
+
+    def resumo(self, linhas=25):
+        """Texto com as funções mais caras (vazio sem perfil de chamadas)."""
+        if self._perfilador is None:
+            return ''
+        if self.modo == 'pyinstrument':
+            return self._perfilador.output_text()
+        saida = io.StringIO()
+        pstats.Stats(self._perfilador, stream=saida).sort_stats('cumulative').print_stats(linhas)
+        return saida.getvalue()
+
+    def exportar(self):
+        """
+        Perfil de chamadas serializado
+
+        Returns:
+            tuple: (bytes, extensão) — '.prof' (pstats) ou '.pyisession'; (None, None) sem perfil
+        """
+        if self._perfilador is None:
+            return None, None
+        if self.modo == 'pyinstrument':
+            return json.dumps(self._perfilador.last_session.to_json()).encode(), '.pyisession'
+        # Mesmo conteúdo que Profile.dump_stats grava
+        self._perfilador.create_stats()
+        return marshal.dumps(self._perfilador.stats), '.prof'
+
+    def salvar(self, diretorio=None, prefixo='rerun'):
+        """
+        Grava o perfil de chamadas e os tempos por etapa (JSON) no diretório
+
+        Args:
+            diretorio (str | None): Diretório de saída (padrão: BB84_PROFILE_DIR)
+            prefixo (str): Início do nome dos arquivos
+
+        Returns:
+            str | None: Caminho do perfil gravado (None se não há diretório ou perfil)
+        """
+        diretorio = diretorio or os.environ.get(VARIAVEL_DIRETORIO)
+        if not self.ativo or not diretorio:
+            return None
+        os.makedirs(diretorio, exist_ok=True)
+        carimbo = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 10**6:06d}"
+        base = os.path.join(diretorio, f"{prefixo}-{carimbo}")
+        with open(base + '.json', 'w') as arquivo:
+            json.dump({'total_s': self.total_s, 'sections': self.tabela()}, arquivo, indent=2)
+        dados, extensao = self.exportar()
+        if dados is None:
+            return None
+        with open(base + extensao, 'wb') as arquivo:
+            arquivo.write(dados)
+        return base + extensao
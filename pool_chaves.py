@@ -0,0 +1,202 @@
+"""
+Pool de bits de chave BB84 pré-gerados
+
+Os bits ficam em um buffer circular e são reabastecidos por uma thread em segundo
+plano (opcionalmente gerados em um processo separado) sempre que o nível cai
+abaixo do limite baixo. Consumidores recebem fatias `memoryview` do buffer, sem
+cópia; o reabastecimento deixa uma reserva antes do ponteiro de leitura para não
+sobrescrever as fatias entregues mais recentemente.
+
+Exemplo:
+    with PoolChaves(capacidade=1 << 22, erro_canal=0.02) as pool:
+        chave = pool.obter(256)
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from AlgorithmImplementation import simular_qubits
+
+
+def gerar_bits_chave(n_qubits, erro_canal, rng):
+    """
+    Gera bits de chave reconciliada a partir de uma simulação vetorizada sem Eve
+
+    A reconciliação é modelada descartando as posições peneiradas em que Alice e
+    Bob discordam; os bits restantes são iguais nos dois lados.
+
+    Args:
+        n_qubits (int): Número de qubits transmitidos
+        erro_canal (float): Taxa de erro do canal quântico
+        rng (np.random.Generator | np.random.SeedSequence): Gerador (ou semente) de números aleatórios
+
+    Returns:
+        np.ndarray: Bits da chave (uint8)
+    """
+    alice_bits, alice_bases, bob_bases, bob_resultados = simular_qubits(
+        n_qubits, erro_canal, rng=np.random.default_rng(rng))
+    mantidos = (alice_bases == bob_bases) & (alice_bits == bob_resultados)
+    return alice_bits[mantidos]
+
+
+class PoolChaves:
+    """
+    Buffer circular de bits de chave com reabastecimento em segundo plano
+
+    O buffer tem `max_pedido` bytes extras no final que espelham o seu início, de
+    modo que qualquer pedido de até `max_pedido` bits é uma fatia contígua. O
+    reabastecimento nunca escreve nos `reserva` bits anteriores ao ponteiro de
+    leitura, então o pool guarda no máximo `capacidade - reserva` bits e uma fatia
+    devolvida por `obter` permanece válida enquanto ela e as fatias entregues
+    depois dela somarem no máximo `reserva` bits (a última fatia entregue é sempre
+    válida); use `bytes(fatia)` para guardá-la por mais tempo.
+
+    Se a geração de bits falhar, a thread de reabastecimento termina, guarda a
+    exceção em `erro` e `obter` passa a levantar RuntimeError.
+
+    Args:
+        capacidade (int): Número máximo de bits mantidos no pool
+        limite_baixo (int | None): Nível que dispara o reabastecimento (padrão: metade da capacidade)
+        max_pedido (int | None): Maior pedido aceito por `obter` (padrão: metade da capacidade)
+        reserva (int | None): Bits antes do ponteiro de leitura que não são reescritos (padrão: max_pedido)
+        erro_canal (float): Taxa de erro do canal usada na simulação
+        qubits_por_bloco (int): Qubits simulados a cada passo de reabastecimento
+        usar_processo (bool): Se True, gera os bits em um processo separado
+        seed (int | np.random.SeedSequence | None): Semente do gerador de números aleatórios
+    """
+
+    def __init__(self, capacidade=1 << 22, limite_baixo=None, max_pedido=None, erro_canal=0.02,
+                 qubits_por_bloco=1 << 20, usar_processo=False, seed=None, reserva=None):
+        self.capacidade = capacidade
+        self.limite_baixo = capacidade // 2 if limite_baixo is None else limite_baixo
+        self.max_pedido = capacidade // 2 if max_pedido is None else max_pedido
+        self.reserva = self.max_pedido if reserva is None else reserva
+        # Sem reabastecimento pendente o nível é pelo menos limite_baixo, e o pool cheio
+        # tem capacidade - reserva bits
+        if not 0 < self.max_pedido <= self.limite_baixo <= capacidade - self.reserva:
+            raise ValueError("expected 0 < max_pedido <= limite_baixo <= capacidade - reserva")
+        if self.reserva < self.max_pedido:
+            raise ValueError("reserva must be at least max_pedido")
+        self.erro_canal = erro_canal
+        self.qubits_por_bloco = qubits_por_bloco
+        self.usar_processo = usar_processo
+        self.sementes = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+        self.buffer = np.empty(capacidade + self.max_pedido, dtype=np.uint8)
+        self.leitura = 0
+        self.escrita = 0
+        self.nivel = 0
+        self.condicao = threading.Condition()
+        self.parado = False
+        self.erro = None
+        self.thread = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    def iniciar(self):
+        """Inicia a thread de reabastecimento."""
+        self.parado = False
+        self.erro = None
+        self.thread = threading.Thread(target=self._reabastecer, name='PoolChaves', daemon=True)
+        self.thread.start()
+
+    def parar(self):
+        """Interrompe o reabastecimento e aguarda a thread terminar."""
+        with self.condicao:
+            self.parado = True
+            self.condicao.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def obter(self, n_bits, timeout=None):
+        """
+        Retira n_bits bits do pool
+
+        Args:
+            n_bits (int): Número de bits desejados (no máximo max_pedido)
+            timeout (float | None): Tempo máximo de espera (s); 0 não espera
+
+        Returns:
+            memoryview | None: Fatia do buffer com os bits (uint8, um bit por byte),
+                ou None se o tempo esgotar antes de haver bits suficientes
+
+        Raises:
+            RuntimeError: Se o reabastecimento falhou e o pool não tem bits suficientes
+        """
+        if not 0 < n_bits <= self.max_pedido:
+            raise ValueError(f"n_bits must be between 1 and {self.max_pedido}")
+        with self.condicao:
+            if not self.condicao.wait_for(
+                    lambda: self.nivel >= n_bits or self.parado or self.erro is not None, timeout):
+                return None
+            if self.nivel < n_bits:
+                if self.erro is not None:
+                    raise RuntimeError("key pool refill failed") from self.erro
+                return None
+            inicio = self.leitura
+            self.leitura = (inicio + n_bits) % self.capacidade
+            self.nivel -= n_bits
+            if self.nivel < self.limite_baixo:
+                self.condicao.notify_all()
+        return memoryview(self.buffer)[inicio:inicio + n_bits]
+
+    def _gerar(self, executor):
+        semente = self.sementes.spawn(1)[0]
+        if executor is None:
+            return gerar_bits_chave(self.qubits_por_bloco, self.erro_canal, semente)
+        return executor.submit(gerar_bits_chave, self.qubits_por_bloco, self.erro_canal, semente).result()
+
+    def _reabastecer(self):
+        executor = ProcessPoolExecutor(max_workers=1) if self.usar_processo else None
+        try:
+            while True:
+                with self.condicao:
+                    self.condicao.wait_for(lambda: self.nivel < self.limite_baixo or self.parado)
+                    if self.parado:
+                        return
+
+                # Enche o pool em blocos até capacidade - reserva
+                while not self.parado:
+                    bits = self._gerar(executor)
+                    with self.condicao:
+                        livre = self.capacidade - self.reserva - self.nivel
+                    bits = bits[:livre]
+                    self._escrever(bits)
+                    with self.condicao:
+                        self.nivel += len(bits)
+                        self.condicao.notify_all()
+                        if len(bits) == livre:
+                            break
+        except Exception as erro:
+            # Sem a thread ninguém reabastece: quem espera em obter precisa saber
+            with self.condicao:
+                self.erro = erro
+                self.condicao.notify_all()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _escrever(self, bits):
+        """Copia bits para o espaço livre a partir do ponteiro de escrita (fora da trava)."""
+        inicio = self.escrita
+        primeira = min(len(bits), self.capacidade - inicio)
+        self.buffer[inicio:inicio + primeira] = bits[:primeira]
+        self.buffer[:len(bits) - primeira] = bits[primeira:]
+
+        # Espelha o início do buffer na área extra para manter as fatias contíguas
+        fim = len(bits) - primeira
+        if inicio < self.max_pedido:
+            espelho = min(inicio + primeira, self.max_pedido)
+            self.buffer[self.capacidade + inicio:self.capacidade + espelho] = self.buffer[inicio:espelho]
+        if fim > 0:
+            espelho = min(fim, self.max_pedido)
+            self.buffer[self.capacidade:self.capacidade + espelho] = self.buffer[:espelho]
+
+        self.escrita = (inicio + len(bits)) % self.capacidade
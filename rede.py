@@ -0,0 +1,318 @@
+"""
+Simulação de uma rede QKD com muitos enlaces BB84 e nós confiáveis
+
+Cada enlace é um par Alice/Bob com comprimento, atenuação, erro de canal e
+presença de Eve próprios. Os qubits detectados de todos os enlaces são simulados
+em sequência, em lotes de no máximo MAX_QUBITS_LOTE qubits (enlaces grandes são
+divididos entre lotes), e as estatísticas por enlace saem de somas por trecho.
+Chaves entre nós que não são vizinhos são retransmitidas por nós confiáveis com XOR (one-time pad) salto a
+salto pelo caminho de maior gargalo. Cada par recebe duas taxas fim a fim: a do
+par isolado (o enlace mais lento do caminho) e a compartilhada, em que a chave de
+cada enlace é dividida igualmente entre os pares que passam por ele.
+
+Exemplo:
+    python rede.py --topology rede.json --pulses 1000000
+    python rede.py --ring 200 --pulses 1000000
+"""
+import argparse
+import json
+
+import numpy as np
+
+from AlgorithmImplementation import fracao_chave_secreta, simular_qubits
+
+MAX_QUBITS_LOTE = 1 << 24
+
+
+def transmitancia(comprimento_km, atenuacao_db_km=0.2, perda_extra_db=0.0, eficiencia_detector=0.2):
+    """
+    Probabilidade de um qubit enviado ser detectado por Bob
+
+    Args:
+        comprimento_km (float | np.ndarray): Comprimento da fibra
+        atenuacao_db_km (float | np.ndarray): Atenuação da fibra (dB/km)
+        perda_extra_db (float | np.ndarray): Perdas fixas (conectores, comutadores)
+        eficiencia_detector (float | np.ndarray): Eficiência dos detectores de Bob
+
+    Returns:
+        float | np.ndarray: Transmitância total do enlace
+    """
+    perda_db = np.asarray(comprimento_km) * atenuacao_db_km + perda_extra_db
+    return eficiencia_detector * 10 ** (-perda_db / 10)
+
+
+def _por_qubit(valores, contagens, ocupados):
+    """Parâmetro dos enlaces de um lote: escalar se for o mesmo em todos, senão um float32 por qubit."""
+    if np.all(valores[ocupados] == valores[ocupados][0]):
+        return float(valores[ocupados][0])
+    return np.repeat(valores.astype(np.float32), contagens)
+
+
+def simular_enlaces(enlaces, n_pulsos=10**6, taxa_pulsos=1e9, eficiencia_correcao=1.16, seed=None):
+    """
+    Simula todos os enlaces da rede de uma vez
+
+    Args:
+        enlaces (list[dict]): Enlaces com as chaves 'origem', 'destino' e,
+            opcionalmente, 'comprimento_km', 'atenuacao_db_km', 'perda_extra_db',
+            'eficiencia_detector', 'erro_canal' e 'fracao_eve' (0 = sem Eve)
+        n_pulsos (int): Qubits enviados por enlace
+        taxa_pulsos (float): Taxa de repetição da fonte (Hz), para converter em bits/s
+        eficiencia_correcao (float): Ineficiência da correção de erros
+        seed (int | None): Semente para reproduzir a simulação
+
+    Returns:
+        dict: Arrays por enlace ('detectados', 'tamanho_chave', 'taxa_erro',
+            'bits_secretos', 'taxa_chave_bps')
+    """
+    rng = np.random.default_rng(seed)
+
+    def parametro(nome, padrao):
+        return np.array([enlace.get(nome, padrao) for enlace in enlaces], dtype=float)
+
+    eta = transmitancia(parametro('comprimento_km', 10.0), parametro('atenuacao_db_km', 0.2),
+                        parametro('perda_extra_db', 0.0), parametro('eficiencia_detector', 0.2))
+    erro_canal = parametro('erro_canal', 0.01)
+    fracao_eve = parametro('fracao_eve', 0.0)
+
+    # Só os qubits que chegam ao detector precisam ser simulados
+    detectados = rng.binomial(n_pulsos, eta)
+
+    n_enlaces = len(enlaces)
+    peneirados = np.zeros(n_enlaces, dtype=np.int64)
+    errados = np.zeros(n_enlaces, dtype=np.int64)
+
+    # Os qubits detectados de todos os enlaces, em sequência, são divididos em lotes de
+    # MAX_QUBITS_LOTE qubits; um enlace pode ocupar parte de um lote ou vários lotes
+    acumulado = np.concatenate(([0], np.cumsum(detectados)))
+    total = int(acumulado[-1])
+    for inicio in range(0, total, MAX_QUBITS_LOTE):
+        fim = min(inicio + MAX_QUBITS_LOTE, total)
+        primeiro = int(np.searchsorted(acumulado, inicio, 'right')) - 1
+        ultimo = int(np.searchsorted(acumulado, fim, 'left'))
+        limites = np.clip(acumulado[primeiro:ultimo + 1], inicio, fim) - inicio
+        contagens = np.diff(limites)
+        ocupados = contagens > 0
+
+        presenca_eve = bool(np.any(fracao_eve[primeiro:ultimo][ocupados] > 0))
+        alice_bits, alice_bases, bob_bases, bob_resultados = simular_qubits(
+            fim - inicio, _por_qubit(erro_canal[primeiro:ultimo], contagens, ocupados), presenca_eve,
+            _por_qubit(fracao_eve[primeiro:ultimo], contagens, ocupados), rng)
+        mesma_base = alice_bases == bob_bases
+        erro = mesma_base & (alice_bits != bob_resultados)
+
+        # Os qubits de cada enlace são contíguos no lote: soma por trecho, sem índice por qubit
+        enlaces_lote = np.arange(primeiro, ultimo)[ocupados]
+        inicios = limites[:-1][ocupados]
+        peneirados[enlaces_lote] += np.add.reduceat(mesma_base, inicios, dtype=np.int64)
+        errados[enlaces_lote] += np.add.reduceat(erro, inicios, dtype=np.int64)
+
+    taxa_erro = np.divide(errados, peneirados, out=np.zeros(n_enlaces), where=peneirados > 0)
+    bits_secretos = np.floor(peneirados * fracao_chave_secreta(taxa_erro, eficiencia_correcao))
+
+    return {
+        'detectados': detectados,
+        'tamanho_chave': peneirados,
+        'taxa_erro': taxa_erro,
+        'bits_secretos': bits_secretos,
+        'taxa_chave_bps': bits_secretos / n_pulsos * taxa_pulsos,
+    }
+
+
+def melhores_caminhos(nos, enlaces, capacidade):
+    """
+    Caminho de maior gargalo entre todos os pares de nós (Floyd-Warshall max-min)
+
+    Args:
+        nos (list): Nomes dos nós
+        enlaces (list[dict]): Enlaces com 'origem' e 'destino'
+        capacidade (np.ndarray): Taxa de chave de cada enlace
+
+    Returns:
+        tuple: (gargalo, proximo) — matriz de taxas fim a fim e matriz de próximo salto
+            (-1 quando não há caminho)
+    """
+    posicao = {no: i for i, no in enumerate(nos)}
+    n = len(nos)
+    gargalo = np.zeros((n, n))
+    proximo = np.full((n, n), -1, dtype=np.int64)
+
+    for enlace, taxa in zip(enlaces, capacidade):
+        a, b = posicao[enlace['origem']], posicao[enlace['destino']]
+        if taxa > gargalo[a, b]:
+            gargalo[a, b] = gargalo[b, a] = taxa
+            proximo[a, b], proximo[b, a] = b, a
+
+    for k in range(n):
+        candidato = np.minimum(gargalo[:, k, None], gargalo[None, k, :])
+        melhora = candidato > gargalo
+        gargalo = np.where(melhora, candidato, gargalo)
+        proximo = np.where(melhora, proximo[:, k, None], proximo)
+
+    np.fill_diagonal(gargalo, np.inf)
+    return gargalo, proximo
+
+
+def reconstruir_caminho(proximo, origem, destino):
+    """Lista de índices de nós de origem a destino (vazia se não houver caminho)."""
+    if proximo[origem, destino] < 0:
+        return []
+    caminho = [origem]
+    while caminho[-1] != destino:
+        caminho.append(int(proximo[caminho[-1], destino]))
+    return caminho
+
+
+def retransmitir_xor(chaves_saltos):
+    """
+    Retransmite uma chave por nós confiáveis usando XOR salto a salto
+
+    A chave fim a fim é a chave do primeiro salto. Cada nó intermediário publica
+    o XOR das chaves dos seus dois saltos; o destino recupera a chave combinando
+    a sua chave com todas as mensagens públicas. Cada salto consome o mesmo número
+    de bits, limitado pelo salto com menos chave.
+
+    Args:
+        chaves_saltos (list[np.ndarray] | np.ndarray): Chave compartilhada de cada salto,
+            em ordem (uint8, um bit por byte ou empacotada; um array 2D tem uma linha por salto)
+
+    Returns:
+        dict: 'chave_origem', 'chave_destino' e 'mensagens_publicas' (uma linha por
+            nó intermediário)
+    """
+    if isinstance(chaves_saltos, np.ndarray) and chaves_saltos.ndim == 2:
+        chaves = chaves_saltos.astype(np.uint8, copy=False)
+    else:
+        tamanho = min(len(chave) for chave in chaves_saltos)
+        chaves = np.stack([np.asarray(chave[:tamanho], dtype=np.uint8) for chave in chaves_saltos])
+
+    mensagens = chaves[:-1] ^ chaves[1:]
+    chave_destino = np.bitwise_xor.reduce(mensagens, axis=0, initial=0) ^ chaves[-1]
+
+    return {
+        'chave_origem': chaves[0],
+        'chave_destino': chave_destino,
+        'mensagens_publicas': mensagens,
+    }
+
+
+def simular_rede(enlaces, n_pulsos=10**6, taxa_pulsos=1e9, eficiencia_correcao=1.16, bits_retransmissao=256,
+                 seed=None):
+    """
+    Simula a rede e calcula a taxa de chave fim a fim entre todos os pares de nós
+
+    Cada par usa o caminho de maior gargalo. 'taxa_chave_bps' é a taxa do par
+    isolado (o enlace mais lento do caminho, como se o par usasse sozinho a chave
+    de todos os saltos); 'taxa_compartilhada_bps' divide a chave de cada enlace
+    igualmente entre os pares cujo caminho passa por ele e fica com o menor
+    quinhão do caminho. A retransmissão de cada par é executada com
+    retransmitir_xor sobre chaves aleatórias de bits_retransmissao bits por salto
+    (empacotadas, já que o XOR é bit a bit), e 'retransmissao_ok' confirma que o destino recuperou a chave da origem.
+
+    Args:
+        enlaces (list[dict]): Enlaces (ver simular_enlaces)
+        n_pulsos (int): Qubits enviados por enlace
+        taxa_pulsos (float): Taxa de repetição da fonte (Hz)
+        eficiencia_correcao (float): Ineficiência da correção de erros
+        bits_retransmissao (int): Bits retransmitidos por par (0 = não executa a retransmissão)
+        seed (int | None): Semente para reproduzir a simulação
+
+    Returns:
+        dict: 'nos', 'enlaces' (resultados por enlace, incluindo 'pares_por_enlace')
+            e 'pares' (caminho, número de saltos, taxas fim a fim isolada e
+            compartilhada e resultado da retransmissão de cada par conectado)
+    """
+    resultado_enlaces = simular_enlaces(enlaces, n_pulsos, taxa_pulsos, eficiencia_correcao, seed)
+    capacidade = resultado_enlaces['taxa_chave_bps']
+    rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+
+    nos = sorted({enlace['origem'] for enlace in enlaces} | {enlace['destino'] for enlace in enlaces}, key=str)
+    posicao = {no: i for i, no in enumerate(nos)}
+    gargalo, proximo = melhores_caminhos(nos, enlaces, capacidade)
+
+    # Enlace usado por cada salto: o de maior taxa entre os dois nós (o mesmo de melhores_caminhos)
+    enlace_salto = {}
+    for indice, (enlace, taxa) in enumerate(zip(enlaces, capacidade)):
+        a, b = posicao[enlace['origem']], posicao[enlace['destino']]
+        atual = enlace_salto.get((a, b))
+        if atual is None or taxa > capacidade[atual]:
+            enlace_salto[a, b] = enlace_salto[b, a] = indice
+
+    pares = []
+    saltos_pares = []
+    bytes_retransmissao = -(-bits_retransmissao // 8)
+    for i in range(len(nos)):
+        for j in range(i + 1, len(nos)):
+            caminho = reconstruir_caminho(proximo, i, j)
+            if not caminho:
+                continue
+            saltos = [enlace_salto[a, b] for a, b in zip(caminho[:-1], caminho[1:])]
+            par = {
+                'origem': nos[i],
+                'destino': nos[j],
+                'caminho': [nos[k] for k in caminho],
+                'saltos': len(saltos),
+                'taxa_chave_bps': float(gargalo[i, j]),
+            }
+            if bits_retransmissao > 0:
+                chaves = np.frombuffer(rng.bytes(len(saltos) * bytes_retransmissao), dtype=np.uint8)
+                retransmissao = retransmitir_xor(chaves.reshape(len(saltos), bytes_retransmissao))
+                par['retransmissao_ok'] = bool(np.array_equal(retransmissao['chave_destino'],
+                                                              retransmissao['chave_origem']))
+                par['bits_publicos'] = (len(saltos) - 1) * bits_retransmissao
+            pares.append(par)
+            saltos_pares.append(saltos)
+
+    # Pares que disputam a chave de cada enlace
+    pares_por_enlace = np.bincount(np.fromiter((s for saltos in saltos_pares for s in saltos), dtype=np.int64),
+                                   minlength=len(enlaces))
+    quinhao = np.divide(capacidade, pares_por_enlace, out=np.zeros(len(enlaces)), where=pares_por_enlace > 0)
+    for par, saltos in zip(pares, saltos_pares):
+        par['taxa_compartilhada_bps'] = float(quinhao[saltos].min())
+    resultado_enlaces['pares_por_enlace'] = pares_por_enlace
+
+    return {'nos': nos, 'enlaces': resultado_enlaces, 'pares': pares}
+
+
+def topologia_anel(n_nos, comprimento_km=(5.0, 40.0), seed=None):
+    """Gera um anel metropolitano com comprimentos de enlace sorteados."""
+    rng = np.random.default_rng(seed)
+    return [{
+        'origem': f'N{i}',
+        'destino': f'N{(i + 1) % n_nos}',
+        'comprimento_km': float(rng.uniform(*comprimento_km)),
+    } for i in range(n_nos)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a trusted-node BB84 network.")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--topology', help="JSON file with a list of links")
+    grupo.add_argument('--ring', type=int, help="Generate a ring with this many nodes")
+    parser.add_argument('--pulses', type=int, default=10**6, help="Qubits sent per link (default: 1000000)")
+    parser.add_argument('--pulse-rate', type=float, default=1e9, help="Source repetition rate in Hz (default: 1e9)")
+    parser.add_argument('--relay-bits', type=int, default=256,
+                        help="Key bits relayed per node pair to check the XOR relay; 0 skips it (default: 256)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.topology:
+        with open(args.topology) as arquivo:
+            enlaces = json.load(arquivo)
+    else:
+        enlaces = topologia_anel(args.ring, seed=args.seed)
+
+    resultado = simular_rede(enlaces, args.pulses, args.pulse_rate, bits_retransmissao=args.relay_bits,
+                             seed=args.seed)
+    saida = {
+        'links': [dict(enlace, qber=float(q), secret_key_rate_bps=float(r), pairs_sharing=int(n))
+                  for enlace, q, r, n in zip(enlaces, resultado['enlaces']['taxa_erro'],
+                                             resultado['enlaces']['taxa_chave_bps'],
+                                             resultado['enlaces']['pares_por_enlace'])],
+        'pairs': resultado['pares'],
+    }
+    print(json.dumps(saida, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Serviço HTTP local que fornece material de chave BB84 simulado
+
+Endpoints (todos GET, respostas em JSON):
+    /key?bits=N                 N bits de chave reconciliada (hexadecimal, MSB primeiro)
+    /simulate?n_bits=N&error_rate=E&eve=none|intercept-resend&eve_fraction=F
+                                Estatísticas de uma simulação do protocolo
+    /metrics                    Latências, vazão, tamanho dos lotes e nível do pool
+    /health                     Verificação simples de disponibilidade
+
+Pedidos de simulação que chegam juntos são agrupados em um único lote vetorizado:
+como os qubits são independentes, cada pedido recebe uma fatia contígua do lote.
+Cada lote tem no máximo MAX_BITS_SIMULACAO qubits (grupos maiores viram vários
+lotes) e a fila aceita no máximo MAX_PEDIDOS_FILA pedidos pendentes. Os bits de
+chave saem de um pool pré-gerado que é reabastecido em segundo plano; os pedidos
+que esperam o pool usam threads próprias, separadas da thread dos lotes.
+
+Exemplo:
+    python servico_chaves.py --port 8084 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from AlgorithmImplementation import simular_qubits
+from pool_chaves import PoolChaves
+
+MAX_BITS_PEDIDO = 1 << 20
+MAX_BITS_SIMULACAO = 1 << 24
+MAX_PEDIDOS_FILA = 1024
+# Threads que podem ficar esperando o reabastecimento do pool ao mesmo tempo
+MAX_ESPERAS_POOL = 8
+# Cada espera no pool dura no máximo isso antes de voltar ao loop e tentar de novo
+INTERVALO_ESPERA_POOL = 0.5
+
+# Endpoints com latências próprias nas métricas; os demais caminhos ficam em 'other'
+ENDPOINTS = ('/key', '/simulate', '/metrics', '/health')
+
+MENSAGENS_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                    500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+registro = logging.getLogger(__name__)
+
+
+class ErroPedido(Exception):
+    """Pedido HTTP inválido (respondido com status 400)."""
+
+
+class ErroServico(Exception):
+    """Serviço temporariamente indisponível (respondido com status 503)."""
+
+
+class Metricas:
+    """Latências por endpoint e contadores de vazão do serviço."""
+
+    def __init__(self, janela=10000):
+        self.inicio = time.monotonic()
+        self.latencias = {}
+        self.janela = janela
+        self.pedidos = {}
+        self.bits_chave = 0
+        self.qubits_simulados = 0
+        self.lotes = 0
+        self.pedidos_em_lotes = 0
+
+    def registrar(self, endpoint, latencia):
+        # Caminhos desconhecidos não criam entradas novas (qualquer cliente poderia inventá-los)
+        if endpoint not in ENDPOINTS:
+            endpoint = 'other'
+        if endpoint not in self.latencias:
+            self.latencias[endpoint] = deque(maxlen=self.janela)
+        self.latencias[endpoint].append(latencia)
+        self.pedidos[endpoint] = self.pedidos.get(endpoint, 0) + 1
+
+    def resumo(self):
+        duracao = time.monotonic() - self.inicio
+        endpoints = {}
+        for endpoint, latencias in self.latencias.items():
+            p50, p95, p99 = np.percentile(np.fromiter(latencias, dtype=float), [50, 95, 99]) * 1000
+            endpoints[endpoint] = {
+                'requests': self.pedidos[endpoint],
+                'requests_per_s': self.pedidos[endpoint] / duracao,
+                'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99, 'max': max(latencias) * 1000},
+            }
+        return {
+            'uptime_s': duracao,
+            'endpoints': endpoints,
+            'key_bits_served': self.bits_chave,
+            'key_bits_per_s': self.bits_chave / duracao,
+            'qubits_simulated': self.qubits_simulados,
+            'batches': self.lotes,
+            'mean_batch_requests': self.pedidos_em_lotes / self.lotes if self.lotes else 0.0,
+        }
+
+
+class ServicoChaves:
+    """
+    Serviço assíncrono de chaves e simulações BB84
+
+    Args:
+        erro_canal (float): Taxa de erro do canal usada para gerar o pool de chaves
+        capacidade_pool (int): Número máximo de bits mantidos no pool
+        janela_lote (float): Tempo (s) de espera para agrupar pedidos de simulação
+        seed (int | None): Semente do gerador de números aleatórios
+    """
+
+    def __init__(self, erro_canal=0.02, capacidade_pool=1 << 22, janela_lote=0.002, seed=None):
+        self.erro_canal = erro_canal
+        self.janela_lote = janela_lote
+        # Geradores independentes: o pool e os lotes rodam em threads diferentes
+        semente_pool, semente_lotes = np.random.SeedSequence(seed).spawn(2)
+        self.rng_lotes = np.random.default_rng(semente_lotes)
+        # A reserva de dois pedidos protege a fatia de um pedido enquanto outro é atendido
+        max_pedido = min(MAX_BITS_PEDIDO, capacidade_pool // 4)
+        self.pool = PoolChaves(capacidade=capacidade_pool, max_pedido=max_pedido, reserva=2 * max_pedido,
+                               erro_canal=erro_canal, seed=semente_pool)
+        self.metricas = Metricas()
+        self.fila_simulacoes = None
+        # Uma thread para os lotes (rng_lotes não é compartilhado entre threads) e
+        # outras para quem espera o pool, para que essas esperas não atrasem os lotes
+        self.executor_lotes = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bb84-lotes')
+        self.executor_pool = ThreadPoolExecutor(max_workers=MAX_ESPERAS_POOL, thread_name_prefix='bb84-pool')
+
+    async def iniciar(self, host='127.0.0.1', porta=8084):
+        self.fila_simulacoes = asyncio.Queue(maxsize=MAX_PEDIDOS_FILA)
+        self.pool.iniciar()
+        self._tarefas = [asyncio.create_task(self._supervisionar_lotes())]
+        return await asyncio.start_server(self._atender_conexao, host, porta)
+
+    def parar(self):
+        """Cancela a tarefa dos lotes e libera as threads e o pool."""
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        self.pool.parar()
+        self.executor_pool.shutdown(wait=False)
+        self.executor_lotes.shutdown(wait=False)
+
+    # Pool de chaves
+
+    async def obter_chave(self, n_bits):
+        chave = self._obter_empacotada(n_bits, 0)
+        loop = asyncio.get_running_loop()
+        while chave is None:
+            if self.pool.parado:
+                raise ErroServico("key pool is stopped")
+            # Pool abaixo do pedido: espera o reabastecimento em uma thread própria e
+            # com tempo limitado, para não prender threads indefinidamente
+            chave = await loop.run_in_executor(self.executor_pool, self._obter_empacotada, n_bits,
+                                               INTERVALO_ESPERA_POOL)
+        self.metricas.bits_chave += n_bits
+        return chave
+
+    def _obter_empacotada(self, n_bits, timeout):
+        """Retira n_bits do pool e os empacota logo em seguida, enquanto a fatia é válida."""
+        try:
+            fatia = self.pool.obter(n_bits, timeout=timeout)
+        except RuntimeError as erro:
+            raise ErroServico(f"key pool unavailable: {erro.__cause__ or erro}") from erro
+        if fatia is None:
+            return None
+        return np.packbits(np.frombuffer(fatia, dtype=np.uint8))
+
+    # Lotes de simulação
+
+    async def simular(self, n_bits, erro_canal, presenca_eve, fracao_eve):
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila_simulacoes.put(((erro_canal, presenca_eve, fracao_eve), n_bits, futuro))
+        return await futuro
+
+    async def _supervisionar_lotes(self):
+        """Mantém _processar_lotes rodando: registra e reinicia a tarefa se ela falhar."""
+        while True:
+            try:
+                await self._processar_lotes()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                registro.exception("Simulation batch task failed; restarting")
+                await asyncio.sleep(self.janela_lote)
+
+    async def _processar_lotes(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pendentes = [await self.fila_simulacoes.get()]
+            await asyncio.sleep(self.janela_lote)
+            while not self.fila_simulacoes.empty():
+                pendentes.append(self.fila_simulacoes.get_nowait())
+
+            # Agrupa os pedidos com os mesmos parâmetros e divide cada grupo em lotes
+            # de no máximo MAX_BITS_SIMULACAO qubits
+            grupos = {}
+            qubits_ultimo_lote = {}
+            for parametros, n_bits, futuro in pendentes:
+                lotes = grupos.setdefault(parametros, [[]])
+                if qubits_ultimo_lote.get(parametros, 0) + n_bits > MAX_BITS_SIMULACAO:
+                    lotes.append([])
+                    qubits_ultimo_lote[parametros] = 0
+                lotes[-1].append((n_bits, futuro))
+                qubits_ultimo_lote[parametros] = qubits_ultimo_lote.get(parametros, 0) + n_bits
+
+            for (erro_canal, presenca_eve, fracao_eve), lotes in grupos.items():
+                for pedidos in lotes:
+                    try:
+                        resultados = await loop.run_in_executor(
+                            self.executor_lotes, self._executar_lote, [n for n, _ in pedidos],
+                            erro_canal, presenca_eve, fracao_eve)
+                    except Exception as erro:
+                        # Só os pedidos deste lote falham; o loop continua com os demais
+                        registro.exception("Simulation batch of %d requests failed", len(pedidos))
+                        for _, futuro in pedidos:
+                            if not futuro.done():
+                                futuro.set_exception(erro)
+                        continue
+                    for (_, futuro), resultado in zip(pedidos, resultados):
+                        resultado['batch_requests'] = len(pedidos)
+                        if not futuro.done():
+                            futuro.set_result(resultado)
+                    self.metricas.lotes += 1
+                    self.metricas.pedidos_em_lotes += len(pedidos)
+                    self.metricas.qubits_simulados += sum(n for n, _ in pedidos)
+
+    def _executar_lote(self, tamanhos, erro_canal, presenca_eve, fracao_eve):
+        alice_bits, alice_bases, bob_bases, bob_resultados = simular_qubits(
+            sum(tamanhos), erro_canal, presenca_eve, fracao_eve, self.rng_lotes)
+        mesma_base = alice_bases == bob_bases
+        erros = mesma_base & (alice_bits != bob_resultados)
+
+        # Contagens por pedido com somas acumuladas nas fronteiras de cada fatia
+        fronteiras = np.concatenate(([0], np.cumsum(tamanhos)))
+        peneirados = np.diff(np.concatenate(([0], np.cumsum(mesma_base)))[fronteiras])
+        errados = np.diff(np.concatenate(([0], np.cumsum(erros)))[fronteiras])
+
+        return [{
+            'n_bits': n_bits,
+            'qber': int(e) / int(p) if p > 0 else 0.0,
+            'sifted_key_length': int(p),
+        } for n_bits, p, e in zip(tamanhos, peneirados, errados)]
+
+    # HTTP
+
+    async def _atender_conexao(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                cabecalhos = {}
+                while True:
+                    cabecalho = await leitor.readline()
+                    if cabecalho in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                inicio = time.perf_counter()
+                metodo, _, resto = linha.decode('latin-1').partition(' ')
+                alvo, _, versao = resto.strip().partition(' ')
+                url = urlsplit(alvo)
+                status, corpo = await self._responder(metodo, url.path, parse_qs(url.query))
+                self.metricas.registrar(url.path, time.perf_counter() - inicio)
+
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                dados = json.dumps(corpo).encode()
+                escritor.write(
+                    f"HTTP/1.1 {status} {MENSAGENS_STATUS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(dados)}\r\n"
+                    f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode() + dados)
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _responder(self, metodo, caminho, consulta):
+        if metodo != 'GET':
+            return 405, {'error': 'only GET is supported'}
+        try:
+            if caminho == '/key':
+                n_bits = _parametro(consulta, 'bits', int, 256, 1, self.pool.max_pedido)
+                chave = await self.obter_chave(n_bits)
+                return 200, {'n_bits': n_bits, 'key': chave.tobytes().hex()}
+            if caminho == '/simulate':
+                n_bits = _parametro(consulta, 'n_bits', int, 1000, 1, MAX_BITS_SIMULACAO)
+                erro_canal = _parametro(consulta, 'error_rate', float, self.erro_canal, 0.0, 1.0)
+                fracao_eve = _parametro(consulta, 'eve_fraction', float, 1.0, 0.0, 1.0)
+                eve = consulta.get('eve', ['none'])[0]
+                if eve not in ('none', 'intercept-resend'):
+                    raise ErroPedido("eve must be 'none' or 'intercept-resend'")
+                return 200, await self.simular(n_bits, erro_canal, eve != 'none', fracao_eve)
+            if caminho == '/metrics':
+                resumo = self.metricas.resumo()
+                resumo['pool_bits'] = self.pool.nivel
+                resumo['pool_capacity'] = self.pool.capacidade
+                return 200, resumo
+            if caminho == '/health':
+                return 200, {'status': 'ok'}
+        except ErroPedido as erro:
+            return 400, {'error': str(erro)}
+        except ErroServico as erro:
+            return 503, {'error': str(erro)}
+        except Exception as erro:
+            return 500, {'error': f'{type(erro).__name__}: {erro}'}
+        return 404, {'error': f'unknown endpoint {caminho}'}
+
+
+def _parametro(consulta, nome, tipo, padrao, minimo, maximo):
+    """Lê e valida um parâmetro numérico da query string."""
+    if nome not in consulta:
+        return padrao
+    try:
+        valor = tipo(consulta[nome][0])
+    except ValueError:
+        raise ErroPedido(f"{nome} must be a number")
+    if not minimo <= valor <= maximo:
+        raise ErroPedido(f"{nome} must be between {minimo} and {maximo}")
+    return valor
+
+
+async def _executar(args):
+    servico = ServicoChaves(erro_canal=args.error_rate, capacidade_pool=args.pool_bits,
+                            janela_lote=args.batch_window_ms / 1000, seed=args.seed)
+    servidor = await servico.iniciar(args.host, args.port)
+    print(f"Serving BB84 keys on http://{args.host}:{args.port}")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        servico.parar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service for simulated BB84 key material.")
+    parser.add_argument('--host', default='127.0.0.1', help="Bind address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8084, help="Port (default: 8084)")
+    parser.add_argument('--error-rate', type=float, default=0.02,
+                        help="Channel error rate used to generate pooled keys (default: 0.02)")
+    parser.add_argument('--pool-bits', type=int, default=1 << 22, help="Key pool capacity in bits (default: 4194304)")
+    parser.add_argument('--batch-window-ms', type=float, default=2.0,
+                        help="Time to wait for simulation requests to coalesce (default: 2 ms)")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed (default: random)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_executar(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
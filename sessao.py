@@ -0,0 +1,186 @@
+"""
+Simulação de uma sessão BB84 no tempo, com vazão de chave secreta em bits/s
+
+A fonte emite um pulso por slot (taxa de repetição da fonte). Em vez de sortear
+cada pulso, a simulação sorteia diretamente os instantes das detecções: depois
+de uma detecção o detector fica cego pelo tempo morto e, a partir daí, o número
+de slots até a próxima detecção é geométrico. A soma dos intervalos de g
+detecções seguidas é g * (slots mortos) + binomial negativa, e entre elas o
+número de bits peneirados e de erros é binomial. Por isso as detecções são
+sorteadas em grupos de g eventos (g = 1 é exato evento a evento; g maior só
+reduz a resolução no tempo) e acumuladas com `np.cumsum`, o que torna horas de
+enlace a GHz viáveis em segundos. Os fechamentos de bloco são encontrados dentro
+de cada lote de grupos, então a memória cresce com o lote e o número de blocos,
+não com a duração da sessão.
+
+A chave peneirada é processada em blocos: cada bloco espera uma ida e volta do
+canal clássico (reconciliação de bases) e depois o tempo de pós-processamento,
+com um bloco de cada vez. A vazão é a chave secreta entregue por intervalo de
+tempo.
+
+Exemplo:
+    python sessao.py --duration 3600 --pulse-rate 1e9 --length 25 --dead-time 50e-9
+"""
+import argparse
+import json
+
+import numpy as np
+
+from AlgorithmImplementation import fracao_chave_secreta, probabilidade_erro
+from rede import transmitancia
+
+GRUPOS_POR_LOTE = 1 << 22
+MAX_GRUPOS = 1 << 26
+
+
+def simular_sessao(duracao_s=1.0, taxa_pulsos=1e9, comprimento_km=25.0, atenuacao_db_km=0.2,
+                   eficiencia_detector=0.2, tempo_morto_s=50e-9, erro_canal=0.01, presenca_eve=False,
+                   fracao_eve=1.0, latencia_rtt_s=1e-3, tempo_pos_processamento_s=5e-3,
+                   tamanho_bloco=10**5, eficiencia_correcao=1.16, intervalo_serie_s=None,
+                   eventos_por_grupo=None, seed=None):
+    """
+    Simula uma sessão e devolve a vazão de chave secreta ao longo do tempo
+
+    Args:
+        duracao_s (float): Duração da sessão (tempo simulado)
+        taxa_pulsos (float): Taxa de repetição da fonte (Hz)
+        comprimento_km (float): Comprimento da fibra
+        atenuacao_db_km (float): Atenuação da fibra (dB/km)
+        eficiencia_detector (float): Eficiência dos detectores de Bob
+        tempo_morto_s (float): Tempo morto do detector após cada detecção
+        erro_canal (float): Taxa de erro do canal quântico
+        presenca_eve (bool): Se True, simula a presença de um espião
+        fracao_eve (float): Fração dos qubits interceptados por Eve (quando presente)
+        latencia_rtt_s (float): Ida e volta do canal clássico por bloco
+        tempo_pos_processamento_s (float): Correção de erros e amplificação de privacidade por bloco
+        tamanho_bloco (int): Bits peneirados por bloco de pós-processamento
+        eficiencia_correcao (float): Ineficiência da correção de erros
+        intervalo_serie_s (float | None): Largura dos intervalos da série (padrão: duração/100)
+        eventos_por_grupo (int | None): Detecções sorteadas juntas (padrão: o menor valor
+            que mantém a sessão abaixo de MAX_GRUPOS grupos)
+        seed (int | None): Semente para reproduzir a simulação
+
+    Returns:
+        dict: Série temporal ('tempo_s', 'deteccoes', 'bits_peneirados',
+            'bits_secretos', 'vazao_bps') e totais da sessão
+    """
+    rng = np.random.default_rng(seed)
+    if intervalo_serie_s is None:
+        intervalo_serie_s = duracao_s / 100
+
+    total_slots = int(round(duracao_s * taxa_pulsos))
+    slots_por_intervalo = max(1, int(round(intervalo_serie_s * taxa_pulsos)))
+    n_intervalos = -(-total_slots // slots_por_intervalo)
+    p_deteccao = float(transmitancia(comprimento_km, atenuacao_db_km, 0.0, eficiencia_detector))
+    taxa_erro_esperada = probabilidade_erro(erro_canal, presenca_eve, fracao_eve)
+    # Slots cegos depois de cada detecção
+    slots_mortos = max(0, int(np.ceil(tempo_morto_s * taxa_pulsos)) - 1)
+
+    eventos_esperados = total_slots / (slots_mortos + 1 / p_deteccao)
+    if eventos_por_grupo is None:
+        eventos_por_grupo = max(1, int(np.ceil(eventos_esperados / MAX_GRUPOS)))
+    g = eventos_por_grupo
+    grupos_por_lote = int(min(GRUPOS_POR_LOTE, eventos_esperados / g * 1.05 + 1000))
+
+    deteccoes = np.zeros(n_intervalos, dtype=np.int64)
+    peneirados = np.zeros(n_intervalos, dtype=np.int64)
+    # Por bloco fechado só guarda o slot de fechamento e os totais acumulados nesse ponto
+    fins_blocos, peneirados_fechamento, erros_fechamento = [], [], []
+    total_peneirados = 0
+    total_erros = 0
+    n_blocos = 0
+
+    ultimo = -1
+    while ultimo < total_slots:
+        # Slot da última detecção de cada grupo de g detecções
+        duracoes = g * (slots_mortos + 1) + rng.negative_binomial(g, p_deteccao, grupos_por_lote)
+        slots = ultimo + np.cumsum(duracoes)
+        ultimo = slots[-1]
+        slots = slots[slots < total_slots]
+        if len(slots) == 0:
+            break
+
+        # Metade das detecções é peneirada; cada bit peneirado erra com a probabilidade do modelo
+        n_peneirados = rng.binomial(g, 0.5, len(slots))
+        n_erros = rng.binomial(n_peneirados, taxa_erro_esperada)
+
+        intervalo = slots // slots_por_intervalo
+        deteccoes += np.bincount(intervalo, minlength=n_intervalos) * g
+        peneirados += np.bincount(intervalo, weights=n_peneirados, minlength=n_intervalos).astype(np.int64)
+
+        # Um bloco fecha no primeiro grupo em que o total peneirado alcança k * tamanho_bloco;
+        # o bloco incompleto do fim do lote continua no próximo pelos totais acumulados
+        peneirados_acumulados = total_peneirados + np.cumsum(n_peneirados)
+        erros_acumulados = total_erros + np.cumsum(n_erros)
+        blocos_ate_aqui = int(peneirados_acumulados[-1]) // tamanho_bloco
+        fechamentos = np.searchsorted(peneirados_acumulados,
+                                      np.arange(n_blocos + 1, blocos_ate_aqui + 1) * tamanho_bloco)
+        fins_blocos.append(slots[fechamentos])
+        peneirados_fechamento.append(peneirados_acumulados[fechamentos])
+        erros_fechamento.append(erros_acumulados[fechamentos])
+        n_blocos = blocos_ate_aqui
+        total_peneirados = int(peneirados_acumulados[-1])
+        total_erros = int(erros_acumulados[-1])
+
+    fins_blocos = np.concatenate(fins_blocos) / taxa_pulsos if fins_blocos else np.zeros(0)
+    tamanhos_blocos = np.diff(np.concatenate(([0], *peneirados_fechamento)))
+    erros_blocos = np.diff(np.concatenate(([0], *erros_fechamento)))
+    taxa_erro_blocos = erros_blocos / np.maximum(tamanhos_blocos, 1)
+    secretos_blocos = np.floor(tamanhos_blocos * fracao_chave_secreta(taxa_erro_blocos, eficiencia_correcao))
+
+    # Pós-processamento sequencial: c_k = max(r_k, c_{k-1}) + t, resolvido com um máximo acumulado
+    prontos = fins_blocos + latencia_rtt_s
+    k = np.arange(n_blocos)
+    concluidos = (k + 1) * tempo_pos_processamento_s
+    if n_blocos:
+        concluidos = concluidos + np.maximum.accumulate(prontos - k * tempo_pos_processamento_s)
+
+    # A série se estende até a entrega do último bloco
+    n_serie = max(n_intervalos, int(concluidos[-1] // intervalo_serie_s) + 1 if n_blocos else 0)
+    bits_secretos = np.bincount((concluidos // intervalo_serie_s).astype(np.int64), weights=secretos_blocos,
+                                minlength=n_serie)
+    deteccoes = np.pad(deteccoes, (0, n_serie - n_intervalos))
+    peneirados = np.pad(peneirados, (0, n_serie - n_intervalos))
+
+    return {
+        'tempo_s': np.arange(n_serie) * intervalo_serie_s,
+        'deteccoes': deteccoes,
+        'bits_peneirados': peneirados,
+        'bits_secretos': bits_secretos,
+        'vazao_bps': bits_secretos / intervalo_serie_s,
+        'taxa_erro': total_erros / total_peneirados if total_peneirados else 0.0,
+        'blocos': int(n_blocos),
+        'eventos_por_grupo': g,
+        'total_bits_secretos': int(secretos_blocos.sum()),
+        'vazao_media_bps': secretos_blocos.sum() / duracao_s,
+        'latencia_ultimo_bloco_s': float(concluidos[-1] - fins_blocos[-1]) if n_blocos else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time-domain BB84 session simulation with secret-key throughput.")
+    parser.add_argument('--duration', type=float, default=1.0, help="Simulated session length in s (default: 1)")
+    parser.add_argument('--pulse-rate', type=float, default=1e9, help="Source repetition rate in Hz (default: 1e9)")
+    parser.add_argument('--length', type=float, default=25.0, help="Fibre length in km (default: 25)")
+    parser.add_argument('--dead-time', type=float, default=50e-9, help="Detector dead time in s (default: 50e-9)")
+    parser.add_argument('--error-rate', type=float, default=0.01, help="Channel error rate (default: 0.01)")
+    parser.add_argument('--eve', choices=['none', 'intercept-resend'], default='none')
+    parser.add_argument('--rtt', type=float, default=1e-3, help="Classical round-trip latency in s (default: 1e-3)")
+    parser.add_argument('--post-processing', type=float, default=5e-3,
+                        help="Post-processing time per block in s (default: 5e-3)")
+    parser.add_argument('--block-size', type=int, default=10**5, help="Sifted bits per block (default: 100000)")
+    parser.add_argument('--bin', type=float, default=None, help="Time-series bin width in s (default: duration/100)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    resultado = simular_sessao(duracao_s=args.duration, taxa_pulsos=args.pulse_rate, comprimento_km=args.length,
+                               tempo_morto_s=args.dead_time, erro_canal=args.error_rate,
+                               presenca_eve=args.eve != 'none', latencia_rtt_s=args.rtt,
+                               tempo_pos_processamento_s=args.post_processing, tamanho_bloco=args.block_size,
+                               intervalo_serie_s=args.bin, seed=args.seed)
+    print(json.dumps({nome: valor.tolist() if isinstance(valor, np.ndarray) else valor
+                      for nome, valor in resultado.items()}, default=float))
+
+
+if __name__ == "__main__":
+    main()
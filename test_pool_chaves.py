@@ -0,0 +1,54 @@
+"""
+Testes de regressão do pool de chaves (pool_chaves.py)
+
+Executar com:
+    python -m pytest -q test_pool_chaves.py
+"""
+import time
+
+import pytest
+
+from pool_chaves import PoolChaves
+
+
+def _esperar_cheio(pool, timeout=10.0):
+    """Espera o reabastecimento deixar o pool com capacidade - reserva bits."""
+    limite = time.monotonic() + timeout
+    while pool.nivel < pool.capacidade - pool.reserva:
+        assert time.monotonic() < limite, "pool was not refilled in time"
+        time.sleep(0.01)
+
+
+def test_fatias_sobrevivem_ao_reabastecimento():
+    with PoolChaves(capacidade=8192, limite_baixo=2048, max_pedido=2048, reserva=4096,
+                    qubits_por_bloco=1 << 14, seed=1) as pool:
+        _esperar_cheio(pool)
+        a = pool.obter(1000, timeout=5)
+        b = pool.obter(1100, timeout=5)
+        copia_a, copia_b = bytes(a), bytes(b)
+
+        # O nível caiu abaixo do limite baixo: espera o reabastecimento terminar
+        _esperar_cheio(pool)
+
+        assert bytes(a) == copia_a
+        assert bytes(b) == copia_b
+
+
+def test_ultima_fatia_valida_com_reserva_padrao():
+    with PoolChaves(capacidade=4096, qubits_por_bloco=1 << 14, seed=2) as pool:
+        for _ in range(20):
+            fatia = pool.obter(2048, timeout=5)
+            copia = bytes(fatia)
+            _esperar_cheio(pool)
+            assert bytes(fatia) == copia
+
+
+def test_falha_no_reabastecimento_chega_a_obter():
+    class PoolComFalha(PoolChaves):
+        def _gerar(self, executor):
+            raise MemoryError("simulated failure")
+
+    with PoolComFalha(capacidade=4096, seed=3) as pool:
+        with pytest.raises(RuntimeError) as excecao:
+            pool.obter(256, timeout=5)
+        assert isinstance(excecao.value.__cause__, MemoryError)
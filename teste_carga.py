@@ -0,0 +1,100 @@
+"""
+Teste de carga do serviço de chaves (servico_chaves.py)
+
+Abre várias conexões HTTP persistentes em paralelo, envia pedidos de chave e de
+simulação e imprime as latências medidas no cliente junto com as métricas do
+próprio serviço.
+
+Exemplo:
+    python servico_chaves.py --port 8084 &
+    python teste_carga.py --port 8084 --concurrency 64 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+
+async def _pedir(leitor, escritor, caminho):
+    escritor.write(f"GET {caminho} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await escritor.drain()
+    status = int((await leitor.readline()).split()[1])
+    tamanho = 0
+    while True:
+        cabecalho = await leitor.readline()
+        if cabecalho in (b'\r\n', b''):
+            break
+        nome, _, valor = cabecalho.decode('latin-1').partition(':')
+        if nome.lower() == 'content-length':
+            tamanho = int(valor)
+    corpo = await leitor.readexactly(tamanho)
+    return status, json.loads(corpo)
+
+
+async def _cliente(host, porta, caminhos, latencias, falhas):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        for caminho in caminhos:
+            inicio = time.perf_counter()
+            status, _ = await _pedir(leitor, escritor, caminho)
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                falhas.append(status)
+    finally:
+        escritor.close()
+
+
+async def executar_carga(host, porta, concorrencia, n_pedidos, bits_chave, n_bits_simulacao, fracao_simulacao, seed=None):
+    """
+    Dispara n_pedidos divididos entre `concorrencia` conexões simultâneas
+
+    Returns:
+        dict: Resumo das latências no cliente, vazão e métricas do serviço
+    """
+    rng = np.random.default_rng(seed)
+    caminhos = np.where(rng.random(n_pedidos) < fracao_simulacao,
+                        f"/simulate?n_bits={n_bits_simulacao}", f"/key?bits={bits_chave}")
+    latencias, falhas = [], []
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(host, porta, caminhos[i::concorrencia], latencias, falhas)
+                           for i in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    _, metricas_servico = await _pedir(leitor, escritor, '/metrics')
+    escritor.close()
+
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) * 1000
+    return {
+        'requests': n_pedidos,
+        'failures': len(falhas),
+        'duration_s': duracao,
+        'requests_per_s': n_pedidos / duracao,
+        'client_latency_ms': {'p50': p50, 'p95': p95, 'p99': p99, 'max': max(latencias) * 1000},
+        'service': metricas_servico,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the local BB84 key service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8084)
+    parser.add_argument('--concurrency', type=int, default=32, help="Simultaneous connections (default: 32)")
+    parser.add_argument('--requests', type=int, default=5000, help="Total requests (default: 5000)")
+    parser.add_argument('--key-bits', type=int, default=256, help="Bits per /key request (default: 256)")
+    parser.add_argument('--sim-bits', type=int, default=1000, help="Qubits per /simulate request (default: 1000)")
+    parser.add_argument('--sim-fraction', type=float, default=0.5,
+                        help="Fraction of requests sent to /simulate (default: 0.5)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    resumo = asyncio.run(executar_carga(args.host, args.port, args.concurrency, args.requests,
+                                        args.key_bits, args.sim_bits, args.sim_fraction, args.seed))
+    print(json.dumps(resumo, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Testes de equivalência estatística entre os motores de simulação
+
+Executa cada motor muitas vezes com sementes independentes, em paralelo, e
+compara as distribuições obtidas:
+    - QBER entre motores: teste de Kolmogorov-Smirnov de duas amostras
+    - tamanho da chave peneirada entre motores: qui-quadrado de homogeneidade
+    - tamanho da chave contra a teoria (Binomial(n_bits, 1/2)): qui-quadrado de aderência
+    - QBER agregado contra a teoria (probabilidade_erro): teste binomial exato
+
+O valor teórico de referência é o do modelo dos circuitos. A tabela também mostra
+o valor que o app usa no passo "Error Estimation" (erro_canal sem Eve e
+0.25 + erro_canal - 0.25 * erro_canal com Eve), só como comparação: ele supõe que
+o erro de canal troca bits nas duas bases, enquanto a porta X dos circuitos não
+altera estados da base Hadamard, então os dois só coincidem com erro_canal = 0.
+
+Exemplo:
+    python validacao.py --runs 80 --n-bits 48 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+from AlgorithmImplementation import MOTORES, probabilidade_erro
+
+# (erro_canal, presenca_eve, fracao_eve)
+CENARIOS = [
+    (0.05, False, 1.0),
+    (0.05, True, 1.0),
+    (0.0, True, 1.0),
+    (0.1, True, 0.5),
+]
+
+
+def taxa_erro_app(erro_canal, presenca_eve):
+    """Valor esperado que o app mostra no passo "Error Estimation"."""
+    if presenca_eve:
+        return 0.25 + erro_canal - (0.25 * erro_canal)
+    return erro_canal
+
+
+def _executar(tarefa):
+    motor, n_bits, erro_canal, presenca_eve, fracao_eve, semente = tarefa
+    resultado = MOTORES[motor](n_bits=n_bits, erro_canal=erro_canal, presenca_eve=presenca_eve,
+                               fracao_eve=fracao_eve, seed=semente)
+    erros = int(np.count_nonzero(resultado['alice_chave'] != resultado['bob_chave']))
+    return resultado['tamanho_chave'], erros
+
+
+def _agrupar_classes(probabilidades, minimo):
+    """Junta classes vizinhas até cada uma ter probabilidade (ou contagem) de pelo menos `minimo`."""
+    grupos = np.zeros(len(probabilidades), dtype=np.int64)
+    acumulado = 0.0
+    grupo = 0
+    for i, p in enumerate(probabilidades):
+        grupos[i] = grupo
+        acumulado += p
+        if acumulado >= minimo:
+            grupo += 1
+            acumulado = 0.0
+    # A sobra do final vai para o último grupo completo
+    if acumulado > 0 and grupo > 0:
+        grupos[grupos == grupo] = grupo - 1
+    return grupos
+
+
+def qui_quadrado_homogeneidade(a, b):
+    """p-valor do qui-quadrado de homogeneidade entre duas amostras discretas."""
+    valores = np.union1d(a, b)
+    contagens = np.array([np.searchsorted(valores, x) for x in (a, b)])
+    tabela = np.array([np.bincount(c, minlength=len(valores)) for c in contagens])
+    grupos = _agrupar_classes(tabela.sum(axis=0), 10)
+    tabela = np.array([np.bincount(grupos, weights=linha) for linha in tabela])
+    if tabela.shape[1] < 2:
+        return 1.0
+    return stats.chi2_contingency(tabela)[1]
+
+
+def qui_quadrado_binomial(amostra, n):
+    """p-valor do qui-quadrado de aderência da amostra a Binomial(n, 1/2)."""
+    k = np.arange(n + 1)
+    esperado = stats.binom.pmf(k, n, 0.5) * len(amostra)
+    grupos = _agrupar_classes(esperado, 5)
+    observado = np.bincount(grupos, weights=np.bincount(amostra, minlength=n + 1))
+    esperado = np.bincount(grupos, weights=esperado)
+    if len(esperado) < 2:
+        return 1.0
+    return stats.chisquare(observado, esperado * observado.sum() / esperado.sum())[1]
+
+
+def validar(motores=('qiskit', 'vetorizado'), cenarios=CENARIOS, n_execucoes=80, n_bits=48, workers=None,
+            alfa=0.01, seed=None):
+    """
+    Roda todos os motores em todos os cenários e aplica os testes
+
+    Args:
+        motores (tuple): Nomes dos motores (chaves de MOTORES)
+        cenarios (list): Tuplas (erro_canal, presenca_eve, fracao_eve)
+        n_execucoes (int): Execuções por motor e cenário
+        n_bits (int): Qubits por execução
+        workers (int | None): Processos em paralelo (padrão: número de CPUs)
+        alfa (float): Nível de significância de cada teste
+        seed (int | None): Semente base
+
+    Returns:
+        list[dict]: Um registro por cenário com estatísticas e p-valores
+    """
+    sementes = np.random.SeedSequence(seed).spawn(len(cenarios) * len(motores))
+    tarefas = []
+    for i, (erro_canal, presenca_eve, fracao_eve) in enumerate(cenarios):
+        for j, motor in enumerate(motores):
+            for semente in sementes[i * len(motores) + j].spawn(n_execucoes):
+                tarefas.append((motor, n_bits, erro_canal, presenca_eve, fracao_eve, semente))
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        saidas = np.array(list(executor.map(_executar, tarefas, chunksize=max(1, n_execucoes // 4))))
+    saidas = saidas.reshape(len(cenarios), len(motores), n_execucoes, 2)
+
+    relatorio = []
+    for (erro_canal, presenca_eve, fracao_eve), por_motor in zip(cenarios, saidas):
+        teoria = probabilidade_erro(erro_canal, presenca_eve, fracao_eve)
+        registro = {
+            'erro_canal': erro_canal,
+            'presenca_eve': presenca_eve,
+            'fracao_eve': fracao_eve,
+            'qber_teoria': teoria,
+            'qber_app': taxa_erro_app(erro_canal, presenca_eve) if fracao_eve == 1.0 else None,
+            'motores': {},
+            'testes': {},
+        }
+        qbers = {}
+        tamanhos = {}
+        for motor, execucoes in zip(motores, por_motor):
+            tamanhos[motor], erros = execucoes[:, 0], execucoes[:, 1]
+            qbers[motor] = erros / np.maximum(tamanhos[motor], 1)
+            qber_agregado = erros.sum() / tamanhos[motor].sum()
+            registro['motores'][motor] = {'qber_medio': qber_agregado, 'tamanho_medio': tamanhos[motor].mean()}
+            registro['testes'][f'{motor}: QBER vs theory (binomial)'] = \
+                stats.binomtest(int(erros.sum()), int(tamanhos[motor].sum()), teoria).pvalue if teoria > 0 \
+                else float(erros.sum() == 0)
+            registro['testes'][f'{motor}: sifted length vs Binomial(n, 1/2) (chi-square)'] = \
+                qui_quadrado_binomial(tamanhos[motor], n_bits)
+
+        for a in range(len(motores)):
+            for b in range(a + 1, len(motores)):
+                par = f'{motores[a]} x {motores[b]}'
+                registro['testes'][f'{par}: QBER (KS)'] = stats.ks_2samp(qbers[motores[a]], qbers[motores[b]]).pvalue
+                registro['testes'][f'{par}: sifted length (chi-square)'] = \
+                    qui_quadrado_homogeneidade(tamanhos[motores[a]], tamanhos[motores[b]])
+
+        registro['aprovado'] = all(p >= alfa for p in registro['testes'].values())
+        relatorio.append(registro)
+    return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistical equivalence checks between BB84 simulation engines.")
+    parser.add_argument('--engines', nargs='+', choices=sorted(MOTORES), default=['qiskit', 'vetorizado'])
+    parser.add_argument('--runs', type=int, default=80, help="Runs per engine and scenario (default: 80)")
+    parser.add_argument('--n-bits', type=int, default=48, help="Qubits per run (default: 48)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--alpha', type=float, default=0.01, help="Significance level per test (default: 0.01)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    relatorio = validar(args.engines, CENARIOS, args.runs, args.n_bits, args.workers, args.alpha, args.seed)
+
+    for registro in relatorio:
+        eve = f"Eve {registro['fracao_eve']:.0%}" if registro['presenca_eve'] else "no Eve"
+        app = f"{registro['qber_app']:.4f}" if registro['qber_app'] is not None else "-"
+        print(f"\nerror rate {registro['erro_canal']:.2f}, {eve}: "
+              f"theory QBER {registro['qber_teoria']:.4f} (app formula {app})")
+        for motor, valores in registro['motores'].items():
+            print(f"  {motor:<12} mean QBER {valores['qber_medio']:.4f}  mean sifted length {valores['tamanho_medio']:.1f}")
+        for teste, p in registro['testes'].items():
+            print(f"  {'ok  ' if p >= args.alpha else 'FAIL'} p={p:.4f}  {teste}")
+
+    aprovado = all(registro['aprovado'] for registro in relatorio)
+    print(f"\n{'PASSED' if aprovado else 'FAILED'} in {time.perf_counter() - inicio:.1f} s")
+    sys.exit(0 if aprovado else 1)
+
+
+if __name__ == "__main__":
+    main()